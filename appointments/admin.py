@@ -1,7 +1,11 @@
 from django.contrib import admin
-from .models import Patient, Procedure, Appointment, WorkingDay, SpecialDay
+from .models import Patient, Procedure, Appointment, WorkingDay, SpecialDay, ArchivedAppointment
+from .forms.schedule import SpecialDayForm, WorkingDayForm, describe_impact
+from .services.impact import affected_by_removal, cancel_appointments, refresh_capacity, reschedule_appointments
 from django.core.exceptions import ValidationError
 from django.contrib import messages
+from django.http import HttpResponseRedirect
+from django.urls import reverse
 from django.utils import timezone
 
 @admin.register(Patient)
@@ -14,13 +18,89 @@ class ProcedureAdmin(admin.ModelAdmin):
     list_display = ("name", "price", "duration_minutes")
     search_fields = ("name",)
 
+class ScheduleRuleAdmin(admin.ModelAdmin):
+    """Mostra o impacto de uma mudança de horário antes de salvar e leva aos afetados depois."""
+
+    def get_changelist_form(self, request, **kwargs):
+        # A edição na listagem também passa pela checagem de impacto
+        kwargs.setdefault("form", self.form)
+        return super().get_changelist_form(request, **kwargs)
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        refresh_capacity(obj)
+        if form.previous is not None:
+            refresh_capacity(form.previous)
+        request.impacted_ids = [appointment.pk for appointment in form.impact]
+
+    def _removal_impact(self, rules):
+        impact = {}
+        for rule in rules:
+            impact.update((appointment.pk, appointment) for appointment in affected_by_removal(rule))
+        return sorted(impact.values(), key=lambda appointment: appointment.date_time)
+
+    def get_deleted_objects(self, objs, request):
+        # Tela de confirmação da exclusão (individual ou em lote): mostra quem fica sem horário
+        if not request.POST.get("post"):
+            impact = self._removal_impact(objs)
+            if impact:
+                self.message_user(
+                    request,
+                    f"{len(impact)} agendamento(s) ficariam fora do horário: " + "; ".join(describe_impact(impact)),
+                    level=messages.WARNING
+                )
+        return super().get_deleted_objects(objs, request)
+
+    def delete_model(self, request, obj):
+        impact = self._removal_impact([obj])
+        super().delete_model(request, obj)
+        refresh_capacity(obj)
+        request.impacted_ids = [appointment.pk for appointment in impact]
+
+    def delete_queryset(self, request, queryset):
+        rules = list(queryset)
+        impact = self._removal_impact(rules)
+        super().delete_queryset(request, queryset)
+        for rule in rules:
+            refresh_capacity(rule)
+        request.impacted_ids = [appointment.pk for appointment in impact]
+
+    def _impact_response(self, request, response):
+        ids = getattr(request, "impacted_ids", None)
+        if not ids:
+            return response
+
+        self.message_user(
+            request,
+            f"{len(ids)} agendamento(s) ficaram fora do horário. Selecione-os e use "
+            "\"Remarcar para o horário livre mais próximo\" ou \"Cancelar consultas\".",
+            level=messages.WARNING
+        )
+        url = reverse("admin:appointments_appointment_changelist")
+        return HttpResponseRedirect(f"{url}?id__in={','.join(map(str, ids))}")
+
+    def response_add(self, request, obj, post_url_continue=None):
+        return self._impact_response(request, super().response_add(request, obj, post_url_continue))
+
+    def response_change(self, request, obj):
+        return self._impact_response(request, super().response_change(request, obj))
+
+    def response_delete(self, request, obj_display, obj_id):
+        return self._impact_response(request, super().response_delete(request, obj_display, obj_id))
+
+    def response_action(self, request, queryset):
+        # A ação "excluir selecionados" passa por delete_queryset
+        return self._impact_response(request, super().response_action(request, queryset))
+
 @admin.register(WorkingDay)
-class WorkingDayAdmin(admin.ModelAdmin):
+class WorkingDayAdmin(ScheduleRuleAdmin):
+    form = WorkingDayForm
     list_display = ("weekday", "opening_time", "closing_time", "is_open")
     list_editable = ("opening_time", "closing_time", "is_open")
 
 @admin.register(SpecialDay)
-class SpecialDayAdmin(admin.ModelAdmin):
+class SpecialDayAdmin(ScheduleRuleAdmin):
+    form = SpecialDayForm
     list_display = ("date", "opening_time", "closing_time", "is_open")
     list_editable = ("opening_time", "closing_time", "is_open")
     search_fields = ("date",)
@@ -32,7 +112,7 @@ class AppointmentAdmin(admin.ModelAdmin):
     search_fields = ("patient__user__username",)
     ordering = ("-date_time",)
 
-    actions = ["mark_done", "mark_no_show", "mark_canceled"]
+    actions = ["mark_done", "mark_no_show", "mark_canceled", "reschedule_to_nearest_free"]
 
     def has_change_permission(self, request, obj =None):
         if obj:
@@ -67,11 +147,41 @@ class AppointmentAdmin(admin.ModelAdmin):
     mark_no_show.short_description = "Marcar como não compareceu"
 
     def mark_canceled(self, request, queryset):
-        for appointment in queryset:
-            try:
-                appointment.cancel()
-            except ValidationError as e:
-                self.message_user(request, str(e), level=messages.ERROR)
-        self.message_user(request, "Consultas canceladas.")
+        # Em lote: um UPDATE só, e só para consultas futuras agendadas ou reservadas
+        ids = list(queryset.values_list("pk", flat=True))
+        canceled = cancel_appointments(ids)
+        skipped = len(ids) - len(canceled)
+        if skipped:
+            self.message_user(
+                request,
+                f"{skipped} consulta(s) ignoradas: só consultas futuras agendadas ou reservadas podem ser canceladas.",
+                level=messages.ERROR
+            )
+        self.message_user(request, f"{len(canceled)} consulta(s) cancelada(s).")
+
+    mark_canceled.short_description = "Cancelar consultas"
+
+    def reschedule_to_nearest_free(self, request, queryset):
+        moved, unplaced = reschedule_appointments(list(queryset.values_list("pk", flat=True)))
+        for appointment in unplaced:
+            self.message_user(
+                request,
+                f"Sem horário livre para {appointment} nos próximos dias.",
+                level=messages.ERROR
+            )
+        self.message_user(request, f"{len(moved)} consulta(s) remarcada(s).")
+
+    reschedule_to_nearest_free.short_description = "Remarcar para o horário livre mais próximo"
+
+@admin.register(ArchivedAppointment)
+class ArchivedAppointmentAdmin(admin.ModelAdmin):
+    list_display = ("patient", "procedure", "date_time", "status", "archived_at")
+    list_filter = ("status",)
+    search_fields = ("patient__user__username",)
+    ordering = ("-date_time",)
+
+    def has_add_permission(self, request):
+        return False
 
-    mark_canceled.short_description = "Cancelar consultas"
\ No newline at end of file
+    def has_change_permission(self, request, obj=None):
+        return False
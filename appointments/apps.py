@@ -3,3 +3,12 @@ from django.apps import AppConfig
 
 class AppointmentsConfig(AppConfig):
     name = 'appointments'
+
+    def ready(self):
+        from django.core.checks import register
+        from . import signals  # noqa: F401
+        from . import ratelimit
+        from .backends import check_shared_cache
+
+        register(check_shared_cache)
+        register(ratelimit.check_shared_cache, deploy=True)
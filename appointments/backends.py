@@ -0,0 +1,68 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.core.checks import Warning
+
+
+def user_cache_key(user_id):
+    return f"auth-user:{user_id}"
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend que guarda em cache o usuário carregado a cada requisição.
+
+    O cache é invalidado quando o usuário é salvo ou removido (``signals.py``),
+    mas o sinal só chega ao cache do processo que salvou: com vários workers,
+    o cache precisa ser compartilhado entre eles (veja ``check_shared_cache``).
+    """
+
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.PROFILE_CACHE_SECONDS)
+
+        return user
+
+    async def aget_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = await cache.aget(key)
+
+        if user is None:
+            user = await super().aget_user(user_id)
+            if user is not None:
+                await cache.aset(key, user, settings.PROFILE_CACHE_SECONDS)
+
+        return user
+
+
+# Sessões guardadas (ou lidas) do cache
+CACHED_SESSION_ENGINES = (
+    "django.contrib.sessions.backends.cache",
+    "django.contrib.sessions.backends.cached_db",
+)
+
+
+def check_shared_cache(app_configs, **kwargs):
+    """Avisa quando usuário ou sessão ficam em cache entre requisições num cache por processo."""
+    if settings.CACHES["default"]["BACKEND"] != "django.core.cache.backends.locmem.LocMemCache":
+        return []
+
+    cached = []
+    backend = f"{CachedModelBackend.__module__}.{CachedModelBackend.__qualname__}"
+    if backend in settings.AUTHENTICATION_BACKENDS:
+        cached.append("CachedModelBackend")
+    if settings.SESSION_ENGINE in CACHED_SESSION_ENGINES:
+        cached.append(f"SESSION_ENGINE={settings.SESSION_ENGINE}")
+    if not cached:
+        return []
+
+    return [Warning(
+        f"{' e '.join(cached)} com LocMemCache: cada worker guarda a própria cópia "
+        "e só o processo que alterou (logout, troca de senha) invalida o cache.",
+        hint="Use um cache compartilhado (CACHE_BACKEND=file), o ModelBackend e sessões no banco.",
+        id="appointments.W001",
+    )]
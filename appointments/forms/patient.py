@@ -1,4 +1,5 @@
 from django import forms
+from django.db import transaction
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import UserCreationForm
 from ..models import Patient
@@ -50,17 +51,20 @@ class PatientRegistrationForm(UserCreationForm):
         return email
 
     def save(self, commit=True):
-        user = super().save(commit)
+        # commit=False: gera o hash da senha (uma única vez) sem gravar ainda
+        user = super().save(commit=False)
 
         # Faz o username ser igual ao email
         user.username = self.cleaned_data["email"]
         user.email = self.cleaned_data["email"].lower()
         if commit:
-            user.save()
-            Patient.objects.create(
-                user=user,
-                phone=self.cleaned_data["phone"],
-                cpf=self.cleaned_data["cpf"]
-            )
+            # Usuário e paciente são criados juntos ou nenhum dos dois
+            with transaction.atomic():
+                user.save()
+                Patient.objects.create(
+                    user=user,
+                    phone=self.cleaned_data["phone"],
+                    cpf=self.cleaned_data["cpf"]
+                )
 
         return user
\ No newline at end of file
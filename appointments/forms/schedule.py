@@ -0,0 +1,68 @@
+from django import forms
+from django.utils import timezone
+from ..models import SpecialDay, WorkingDay
+from ..services.impact import affected_appointments, affected_by_removal
+
+# Quantos agendamentos afetados aparecem listados no erro
+IMPACT_PREVIEW_LIMIT = 20
+
+
+def describe_impact(appointments):
+    """Uma linha por agendamento afetado, até ``IMPACT_PREVIEW_LIMIT``."""
+    lines = [
+        f"{timezone.localtime(appointment.date_time):%d/%m/%Y %H:%M} — "
+        f"{appointment.patient} — {appointment.procedure}"
+        for appointment in appointments[:IMPACT_PREVIEW_LIMIT]
+    ]
+    if len(appointments) > IMPACT_PREVIEW_LIMIT:
+        lines.append(f"... e mais {len(appointments) - IMPACT_PREVIEW_LIMIT}.")
+    return lines
+
+
+class ScheduleRuleForm(forms.ModelForm):
+    """Regra de horário que, antes de salvar, lista os agendamentos que ficariam fora do horário."""
+
+    confirm_impact = forms.BooleanField(
+        required=False,
+        label="Salvar mesmo assim",
+        help_text="Os agendamentos afetados poderão ser remarcados ou cancelados em lote."
+    )
+
+    def _post_clean(self):
+        # Aqui a instância já tem os valores propostos, mas ainda não foi salva
+        super()._post_clean()
+        self.impact = []
+
+        self.previous = None
+
+        if self.errors or (self.instance.pk and not self.has_changed()):
+            return
+
+        impact = affected_appointments(self.instance)
+
+        # Mudou de dia: os agendamentos do dia antigo ficam com a regra que sobra
+        if self.instance.pk and {"weekday", "date"} & set(self.changed_data):
+            self.previous = type(self.instance)._default_manager.get(pk=self.instance.pk)
+            impact += affected_by_removal(self.previous)
+
+        self.impact = sorted({appointment.pk: appointment for appointment in impact}.values(),
+                             key=lambda appointment: appointment.date_time)
+        if self.impact and not self.cleaned_data.get("confirm_impact"):
+            errors = [
+                f"{len(self.impact)} agendamento(s) ficariam fora do horário. "
+                "Confira abaixo e marque \"Salvar mesmo assim\" para continuar "
+                "(na listagem, abra o registro para confirmar)."
+            ]
+            self.add_error(None, errors + describe_impact(self.impact))
+
+
+class WorkingDayForm(ScheduleRuleForm):
+    class Meta:
+        model = WorkingDay
+        fields = "__all__"
+
+
+class SpecialDayForm(ScheduleRuleForm):
+    class Meta:
+        model = SpecialDay
+        fields = "__all__"
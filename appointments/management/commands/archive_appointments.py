@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from ...services.archive import archive_appointments, archive_cutoff
+
+
+class Command(BaseCommand):
+    help = "Move agendamentos encerrados antigos para a tabela de arquivo."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.APPOINTMENT_ARCHIVE_AFTER_DAYS,
+            help="Idade mínima, em dias, dos agendamentos arquivados.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Quantidade de agendamentos movidos por transação.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = archive_cutoff(options["days"])
+        moved = archive_appointments(cutoff, chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"{moved} agendamento(s) anteriores a {cutoff:%d/%m/%Y} arquivado(s)."
+        ))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+from ...services.transfer import export_clinic
+
+
+class Command(BaseCommand):
+    help = "Exporta os dados da clínica em JSONL comprimido, com manifesto de checksums."
+
+    def add_arguments(self, parser):
+        parser.add_argument("directory", help="Diretório onde os arquivos serão gravados.")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Quantidade de linhas lidas do banco por vez.",
+        )
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Banco de onde os dados são lidos.",
+        )
+
+    def handle(self, *args, **options):
+        manifest = export_clinic(
+            options["directory"],
+            chunk_size=options["chunk_size"],
+            using=options["database"],
+        )
+        for entry in manifest["models"]:
+            self.stdout.write(f"{entry['model']}: {entry['rows']} linha(s)")
+        self.stdout.write(self.style.SUCCESS(f"Exportação gravada em {options['directory']}."))
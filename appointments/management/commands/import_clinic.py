@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+from ...services.transfer import import_clinic, verify_export
+
+
+class Command(BaseCommand):
+    help = "Restaura uma exportação do export_clinic, conferindo o manifesto de checksums."
+
+    def add_arguments(self, parser):
+        parser.add_argument("directory", help="Diretório gerado pelo export_clinic.")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Quantidade de linhas inseridas por vez.",
+        )
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Banco onde os dados são restaurados.",
+        )
+        parser.add_argument(
+            "--replace",
+            action="store_true",
+            help="Apaga os dados atuais da clínica antes de restaurar.",
+        )
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Só confere os arquivos contra o manifesto, sem gravar nada.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            if options["check"]:
+                loaded = verify_export(options["directory"])
+            else:
+                loaded = import_clinic(
+                    options["directory"],
+                    chunk_size=options["chunk_size"],
+                    replace=options["replace"],
+                    using=options["database"],
+                )
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        for label, rows in loaded.items():
+            self.stdout.write(f"{label}: {rows} linha(s)")
+        if options["check"]:
+            self.stdout.write(self.style.SUCCESS("Arquivos conferem com o manifesto."))
+        else:
+            self.stdout.write(self.style.SUCCESS("Dados restaurados."))
@@ -0,0 +1,34 @@
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from ...services.reports import appointment_date_range, rebuild_daily_stats
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise CommandError(f"Data inválida: {value} (use AAAA-MM-DD).")
+
+
+class Command(BaseCommand):
+    help = "Recalcula o consolidado diário de agendamentos (DailyStat/DailyCapacity)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", type=parse_date, help="Data inicial (AAAA-MM-DD).")
+        parser.add_argument("--end", type=parse_date, help="Data final (AAAA-MM-DD).")
+
+    def handle(self, *args, **options):
+        first, last = appointment_date_range()
+        start = options["start"] or first
+        end = options["end"] or last
+
+        if not start or not end:
+            self.stdout.write("Nenhum agendamento encontrado.")
+            return
+        if start > end:
+            raise CommandError("A data inicial deve ser anterior à data final.")
+
+        stats, days = rebuild_daily_stats(start, end)
+        self.stdout.write(self.style.SUCCESS(
+            f"Consolidado recalculado de {start} a {end}: {stats} linha(s), {days} dia(s)."
+        ))
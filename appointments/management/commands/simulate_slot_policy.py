@@ -0,0 +1,35 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from ...services.simulation import simulate
+from .rebuild_daily_stats import parse_date
+
+
+class Command(BaseCommand):
+    help = "Reproduz as reservas do histórico e compara a ocupação da agenda em cada política de horários."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", type=parse_date, help="Data inicial (AAAA-MM-DD); padrão: 90 dias atrás.")
+        parser.add_argument("--end", type=parse_date, help="Data final (AAAA-MM-DD); padrão: hoje.")
+        parser.add_argument("--runs", type=int, default=20, help="Sorteios por política (média).")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        end = options["end"] or timezone.localdate()
+        start = options["start"] or end - timedelta(days=90)
+        if start > end:
+            raise CommandError("A data inicial deve ser anterior à data final.")
+
+        results = simulate(start, end, runs=options["runs"], seed=options["seed"])
+        days = next(iter(results.values()))["days"]
+        if not days:
+            self.stdout.write("Nenhuma reserva no período.")
+            return
+
+        self.stdout.write(f"{days} dia(s) de {start} a {end}, média de {options['runs']} sorteio(s):")
+        self.stdout.write(f"{'política':<15}{'pedidos':>9}{'perdidos':>10}{'ocupação':>10}{'ociosos':>10}")
+        for policy, result in results.items():
+            self.stdout.write(
+                f"{policy:<15}{result['requests']:>9.0f}{result['rejected']:>10.1f}"
+                f"{result['utilization']:>9.1%}{result['idle_minutes']:>7.0f}min"
+            )
@@ -0,0 +1,74 @@
+from functools import partial
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+from .models import Patient
+
+
+def profile_cache_key(user_id):
+    return f"patient-profile:{user_id}"
+
+
+def get_patient(request):
+    if not hasattr(request, "_cached_patient"):
+        user = request.user
+        patient = None
+
+        if user.is_authenticated:
+            key = profile_cache_key(user.pk)
+            patient = cache.get(key)
+            if patient is None:
+                patient = Patient.objects.filter(user_id=user.pk).first()
+                if patient is not None:
+                    cache.set(key, patient, settings.PROFILE_CACHE_SECONDS)
+
+        request._cached_patient = patient
+    return request._cached_patient
+
+
+async def aget_patient(request):
+    if not hasattr(request, "_cached_patient"):
+        user = await request.auser()
+        patient = None
+
+        if user.is_authenticated:
+            key = profile_cache_key(user.pk)
+            patient = await cache.aget(key)
+            if patient is None:
+                patient = await Patient.objects.filter(user_id=user.pk).afirst()
+                if patient is not None:
+                    await cache.aset(key, patient, settings.PROFILE_CACHE_SECONDS)
+
+        request._cached_patient = patient
+    return request._cached_patient
+
+
+class PatientProfileMiddleware:
+    """Coloca em ``request.patient`` o perfil do paciente, carregado sob demanda e em cache.
+
+    Views assíncronas usam ``await request.apatient()``, como ``request.auser()``.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        self.attach(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        self.attach(request)
+        return await self.get_response(request)
+
+    def attach(self, request):
+        request.patient = SimpleLazyObject(lambda: get_patient(request))
+        request.apatient = partial(aget_patient, request)
@@ -0,0 +1,46 @@
+# Generated by Django 6.0.2 on 2026-10-19 11:25
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0006_specialday_workingday_alter_appointment_patient'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyCapacity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('open_minutes', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Capacidade diária',
+                'verbose_name_plural': 'Capacidades diárias',
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(db_index=True)),
+                ('scheduled_count', models.IntegerField(default=0)),
+                ('canceled_count', models.IntegerField(default=0)),
+                ('done_count', models.IntegerField(default=0)),
+                ('no_show_count', models.IntegerField(default=0)),
+                ('booked_minutes', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=12)),
+                ('procedure', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='appointments.procedure')),
+            ],
+            options={
+                'verbose_name': 'Estatística diária',
+                'verbose_name_plural': 'Estatísticas diárias',
+                'constraints': [models.UniqueConstraint(fields=('date', 'procedure'), name='unique_daily_stat')],
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 6.0.2 on 2026-10-19 11:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0007_daily_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedAppointment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.BigIntegerField(unique=True)),
+                ('date_time', models.DateTimeField(verbose_name='Data e Horário')),
+                ('status', models.CharField(max_length=20)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Agendamento arquivado',
+                'verbose_name_plural': 'Agendamentos arquivados',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['status', 'date_time'], name='appointment_status_96be7e_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedappointment',
+            name='patient',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_appointments', to='appointments.patient'),
+        ),
+        migrations.AddField(
+            model_name='archivedappointment',
+            name='procedure',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='appointments.procedure', verbose_name='Procedimento'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedappointment',
+            index=models.Index(fields=['patient', 'date_time'], name='appointment_patient_b31c31_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-19 11:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0008_archived_appointment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointment',
+            name='hold_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='appointment',
+            name='status',
+            field=models.CharField(choices=[('HELD', 'Reservado'), ('SCHEDULED', 'Agendado'), ('CANCELED', 'Cancelado'), ('DONE', 'Concluído'), ('NO_SHOW', 'Não compareceu')], default='SCHEDULED', max_length=20),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 6.0.2 on 2026-10-19 14:05
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def count_archived(apps, schema_editor):
+    Patient = apps.get_model("appointments", "Patient")
+    ArchivedAppointment = apps.get_model("appointments", "ArchivedAppointment")
+
+    totals = (
+        ArchivedAppointment.objects
+        .values("patient")
+        .annotate(done=Count("pk", filter=Q(status="DONE")), no_show=Count("pk", filter=Q(status="NO_SHOW")))
+    )
+    for row in totals:
+        Patient.objects.filter(pk=row["patient"]).update(
+            archived_done=row["done"], archived_no_show=row["no_show"]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0009_appointment_hold'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='patient',
+            name='archived_done',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='patient',
+            name='archived_no_show',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_archived, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,6 @@
 from .patient import Patient, validate_cpf
 from .procedure import Procedure
 from .schedule import WorkingDay, SpecialDay
-from .appointment import Appointment
\ No newline at end of file
+from .report import DailyStat, DailyCapacity
+from .appointment import Appointment
+from .archive import ArchivedAppointment
\ No newline at end of file
@@ -1,13 +1,26 @@
-from django.db import models
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, models, transaction
+from django.db.models import Q
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from datetime import timedelta
-from .patient import Patient
+from .patient import Patient, summary_cache_key
 from .procedure import Procedure
-from .schedule import WorkingDay, SpecialDay
+from .schedule import WorkingDay, SpecialDay, within_hours
+from .report import DailyCapacity, DailyStat
+
+class AppointmentQuerySet(models.QuerySet):
+    def occupying(self, now=None):
+        """Agendamentos que ocupam horário: confirmados e reservas ainda válidas."""
+        now = now or timezone.now()
+        return self.filter(
+            Q(status="SCHEDULED") | Q(status="HELD", hold_expires_at__gt=now)
+        )
 
 class Appointment(models.Model):
     STATUS_CHOICES = [
+        ("HELD", "Reservado"),
         ("SCHEDULED", "Agendado"),
         ("CANCELED", "Cancelado"),
         ("DONE", "Concluído"),
@@ -22,19 +35,57 @@ class Appointment(models.Model):
         choices=STATUS_CHOICES,
         default="SCHEDULED",
     )
+    hold_expires_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = AppointmentQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Agendamento"
         verbose_name_plural = "Agendamentos"
+        indexes = [
+            models.Index(fields=["status", "date_time"]),
+        ]
 
     def __str__(self):
         return f"{self.patient.user.username} - {self.date_time}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Guarda o estado carregado para atualizar o consolidado diário no save
+        instance._stat_snapshot = instance._stat_key()
+        return instance
+
+    def _stat_key(self):
+        values = self.__dict__
+        if not all(field in values for field in ("date_time", "procedure_id", "status")):
+            return None
+        return (values["date_time"], values["procedure_id"], values["status"])
+
+    def _record_stats(self, old, new):
+        if old == new:
+            return
+
+        for key, sign in ((old, -1), (new, 1)):
+            if key is None:
+                continue
+            date_time, procedure_id, status = key
+            if procedure_id == self.procedure_id:
+                procedure = self.procedure
+            else:
+                procedure = Procedure.objects.get(pk=procedure_id)
+            DailyStat.apply(timezone.localdate(date_time), procedure, status, sign)
     
     def clean(self):
+        # Validação sempre lê do banco primário (nunca de uma réplica atrasada).
+        # Alias explícito: perguntar ao roteador marcaria a requisição como escrita
+        db = DEFAULT_DB_ALIAS
+
         # Trava alteração depois que aconteceu
+        old = None
         if self.pk:
-            old = Appointment.objects.get(pk=self.pk)
+            old = Appointment.objects.using(db).get(pk=self.pk)
 
             if old.date_time < timezone.now():
                 if self.date_time != old.date_time or self.procedure != old.procedure:
@@ -43,41 +94,45 @@ class Appointment(models.Model):
             if old.status in ["DONE", "NO_SHOW"]:
                 raise ValidationError("Não é permitido alterar consultas concluídas ou faltas.")
 
-        # Trava para data no passado
+        # Trava para data no passado (mudança só de status em consulta passada é permitida)
         if self.date_time and self.date_time < timezone.now():
-            raise ValidationError("Não é possível agendar uma consulta para uma data que já passou.")
-                
-        date = self.date_time.date()
-        time_ = self.date_time.time()
+            if old is None or self.date_time != old.date_time:
+                raise ValidationError("Não é possível agendar uma consulta para uma data que já passou.")
+
+        date = timezone.localdate(self.date_time)
+        minutes = self.procedure.duration_minutes
 
         # 🔎 verifica exceção primeiro
-        special = SpecialDay.objects.filter(date=date).first()
+        special = SpecialDay.objects.using(db).filter(date=date).first()
 
         if special:
             if not special.is_open:
                 raise ValidationError("A clínica não funciona neste dia.")
             if not special.opening_time or not special.closing_time:
                 raise ValidationError("Horário especial não configurado.")
-            if not (special.opening_time <= time_ < special.closing_time):
+            if not within_hours(self.date_time, minutes, special.opening_time, special.closing_time):
                 raise ValidationError("Fora do horário especial.")
         else:
-            weekday = self.date_time.weekday()
-            working_day = WorkingDay.objects.filter(weekday=weekday, is_open=True).first()
+            weekday = date.weekday()
+            working_day = WorkingDay.objects.using(db).filter(weekday=weekday, is_open=True).first()
 
             if not working_day:
                 raise ValidationError("A clínica não funciona neste dia da semana.")
 
-            if not (working_day.opening_time <= time_ < working_day.closing_time):
+            if not within_hours(self.date_time, minutes, working_day.opening_time, working_day.closing_time):
                 raise ValidationError("Fora do horário de funcionamento.")
 
-        # ⚠ conflito de horário
+        # Só agendamentos que ocupam horário precisam checar conflito
+        if self.status not in ("SCHEDULED", "HELD"):
+            return
+
+        # ⚠ conflito de horário (inclui reservas de outros pacientes)
         start_time = self.date_time
-        end_time = start_time + timedelta(minutes=self.procedure.duration_minutes)
+        end_time = start_time + timedelta(minutes=minutes)
 
-        conflict = Appointment.objects.filter(
-            date_time__date=start_time.date(),
-            status="SCHEDULED"
-        ).exclude(pk=self.pk)
+        conflict = Appointment.objects.using(db).occupying().filter(
+            date_time__date=date
+        ).exclude(pk=self.pk).select_related("procedure")
 
         for existing in conflict:
             existing_start = existing.date_time
@@ -89,6 +144,64 @@ class Appointment(models.Model):
                     f"às {existing_end.strftime('%H:%M')}."
                 )
 
+    def _lock_day(self):
+        """Trava o dia (linha de capacidade) até o fim da transação.
+
+        Checar conflito e gravar não é atômico: sem a trava, duas reservas
+        simultâneas do mesmo horário passariam as duas pela checagem.
+        """
+        date = timezone.localdate(self.date_time)
+        DailyCapacity.ensure(date)
+        DailyCapacity.objects.using(DEFAULT_DB_ALIAS).select_for_update().get(date=date)
+
+    @classmethod
+    def hold(cls, patient, procedure, date_time):
+        """Reserva o horário por alguns minutos até o paciente confirmar."""
+        now = timezone.now()
+
+        with transaction.atomic():
+            # Libera reservas vencidas e a reserva anterior do mesmo paciente
+            cls.objects.filter(status="HELD").filter(
+                Q(hold_expires_at__lte=now) | Q(patient=patient)
+            ).delete()
+
+            appointment = cls(
+                patient=patient,
+                procedure=procedure,
+                date_time=date_time,
+                status="HELD",
+                hold_expires_at=now + timedelta(minutes=settings.SLOT_HOLD_MINUTES),
+            )
+            appointment.save()
+
+        return appointment
+
+    def confirm_hold(self):
+        # Transição condicional da linha, revalidada com o dia travado: o
+        # horário pode ter sido ocupado ou ter saído do expediente desde a reserva
+        held = (self.status, self.hold_expires_at)
+        with transaction.atomic():
+            self._lock_day()
+            updated = Appointment.objects.filter(
+                pk=self.pk,
+                status="HELD",
+                hold_expires_at__gt=timezone.now()
+            ).update(status="SCHEDULED", hold_expires_at=None)
+
+            if not updated:
+                raise ValidationError("A reserva deste horário expirou. Escolha o horário novamente.")
+
+            self.status = "SCHEDULED"
+            self.hold_expires_at = None
+            try:
+                self.full_clean()
+            except ValidationError:
+                self.status, self.hold_expires_at = held
+                raise
+            self._record_stats(getattr(self, "_stat_snapshot", None), self._stat_key())
+        self._stat_snapshot = self._stat_key()
+        cache.delete(summary_cache_key(self.patient_id))
+
     def cancel(self):
         if self.status != "SCHEDULED":
             raise ValidationError("Este agendamento não pode ser cancelado.")
@@ -114,5 +227,18 @@ class Appointment(models.Model):
         self.save(update_fields=["status"])
     
     def save(self, *args, **kwargs):
-        self.full_clean()
-        super().save(*args, **kwargs)
\ No newline at end of file
+        with transaction.atomic():
+            if self.status in ("SCHEDULED", "HELD") and self.date_time:
+                self._lock_day()
+            self.full_clean()
+            super().save(*args, **kwargs)
+            self._record_stats(getattr(self, "_stat_snapshot", None), self._stat_key())
+        self._stat_snapshot = self._stat_key()
+        cache.delete(summary_cache_key(self.patient_id))
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            self._record_stats(getattr(self, "_stat_snapshot", None) or self._stat_key(), None)
+            result = super().delete(*args, **kwargs)
+        cache.delete(summary_cache_key(self.patient_id))
+        return result
\ No newline at end of file
@@ -0,0 +1,24 @@
+from django.db import models
+from .patient import Patient
+from .procedure import Procedure
+
+class ArchivedAppointment(models.Model):
+    """Agendamento antigo (concluído, cancelado ou falta) movido para fora da tabela principal."""
+
+    original_id = models.BigIntegerField(unique=True)
+    patient = models.ForeignKey(Patient, related_name="archived_appointments", on_delete=models.CASCADE)
+    procedure = models.ForeignKey(Procedure, on_delete=models.CASCADE, verbose_name="Procedimento")
+    date_time = models.DateTimeField(verbose_name="Data e Horário")
+    status = models.CharField(max_length=20)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Agendamento arquivado"
+        verbose_name_plural = "Agendamentos arquivados"
+        indexes = [
+            models.Index(fields=["patient", "date_time"]),
+        ]
+
+    def __str__(self):
+        return f"{self.patient} - {self.date_time}"
@@ -4,6 +4,9 @@ from django.core.exceptions import ValidationError
 from django.utils import timezone
 import re
 
+def summary_cache_key(patient_id):
+    return f"patient-summary:{patient_id}"
+
 # Validador de CPF
 def validate_cpf(value):
     cpf = re.sub(r'[^0-9]', '', value)
@@ -36,12 +39,27 @@ class Patient(models.Model):
         validators=[validate_cpf]
         )
     birth_date = models.DateField(null=True, blank=True)
+    # Totais do arquivo, mantidos pelo archive_appointments: o resumo da home
+    # não precisa consultar a tabela de arquivo
+    archived_done = models.PositiveIntegerField(default=0, editable=False)
+    archived_no_show = models.PositiveIntegerField(default=0, editable=False)
+
+    def appointment_history(self, start_date=None, end_date=None, ordering="date_time"):
+        # Junta consultas da tabela principal e do arquivo em uma única consulta (UNION)
+        filters = {
+            "date_time__lt": timezone.now(),
+            "status__in": ["DONE", "NO_SHOW"],
+        }
+        if start_date:
+            filters["date_time__date__gte"] = start_date
+        if end_date:
+            filters["date_time__date__lte"] = end_date
+
+        fields = ("procedure__name", "date_time", "status")
+        live = self.appointments.filter(**filters).values(*fields)
+        archived = self.archived_appointments.filter(**filters).values(*fields)
 
-    def appointment_history(self):
-        return self.appointments.filter(
-            date_time__lt=timezone.now(),
-            status__in=["DONE", "NO_SHOW"]
-        ).order_by('date_time')
+        return live.union(archived, all=True).order_by(ordering)
 
     def __str__(self):
         return f"{self.user.first_name} {self.user.last_name}"
@@ -0,0 +1,98 @@
+from django.db import models
+from django.db.models import F
+from decimal import Decimal
+from .procedure import Procedure
+from .schedule import WorkingDay, SpecialDay
+
+# Campo de contagem para cada status do agendamento
+STATUS_COUNT_FIELDS = {
+    "SCHEDULED": "scheduled_count",
+    "CANCELED": "canceled_count",
+    "DONE": "done_count",
+    "NO_SHOW": "no_show_count",
+}
+
+# Status que ocupam a cadeira (cancelado libera o horário)
+OCCUPYING_STATUSES = ("SCHEDULED", "DONE", "NO_SHOW")
+
+
+def open_minutes_for(date):
+    special = SpecialDay.objects.filter(date=date).first()
+
+    if special:
+        if not special.is_open or not special.opening_time or not special.closing_time:
+            return 0
+        opening, closing = special.opening_time, special.closing_time
+    else:
+        working_day = WorkingDay.objects.filter(weekday=date.weekday(), is_open=True).first()
+        if not working_day:
+            return 0
+        opening, closing = working_day.opening_time, working_day.closing_time
+
+    minutes = (closing.hour * 60 + closing.minute) - (opening.hour * 60 + opening.minute)
+    return max(minutes, 0)
+
+
+class DailyCapacity(models.Model):
+    date = models.DateField(unique=True)
+    open_minutes = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Capacidade diária"
+        verbose_name_plural = "Capacidades diárias"
+
+    def __str__(self):
+        return f"{self.date} - {self.open_minutes} min"
+
+    @classmethod
+    def ensure(cls, date):
+        cls.objects.get_or_create(date=date, defaults={"open_minutes": open_minutes_for(date)})
+
+
+class DailyStat(models.Model):
+    """Consolidado diário por procedimento, mantido a cada transição de status."""
+
+    date = models.DateField(db_index=True)
+    procedure = models.ForeignKey(Procedure, related_name="daily_stats", on_delete=models.CASCADE)
+    scheduled_count = models.IntegerField(default=0)
+    canceled_count = models.IntegerField(default=0)
+    done_count = models.IntegerField(default=0)
+    no_show_count = models.IntegerField(default=0)
+    booked_minutes = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0"))
+
+    class Meta:
+        verbose_name = "Estatística diária"
+        verbose_name_plural = "Estatísticas diárias"
+        constraints = [
+            models.UniqueConstraint(fields=["date", "procedure"], name="unique_daily_stat"),
+        ]
+
+    def __str__(self):
+        return f"{self.date} - {self.procedure}"
+
+    @staticmethod
+    def contribution(procedure, status):
+        deltas = {}
+        field = STATUS_COUNT_FIELDS.get(status)
+        if field is None:
+            return deltas
+
+        deltas[field] = 1
+        if status in OCCUPYING_STATUSES:
+            deltas["booked_minutes"] = procedure.duration_minutes
+        if status == "DONE":
+            deltas["revenue"] = procedure.price
+        return deltas
+
+    @classmethod
+    def apply(cls, date, procedure, status, sign):
+        deltas = cls.contribution(procedure, status)
+        if not deltas:
+            return
+
+        DailyCapacity.ensure(date)
+        stat, _ = cls.objects.get_or_create(date=date, procedure=procedure)
+        cls.objects.filter(pk=stat.pk).update(**{
+            field: F(field) + sign * value for field, value in deltas.items()
+        })
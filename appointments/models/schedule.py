@@ -1,4 +1,20 @@
+from datetime import datetime, timedelta
 from django.db import models
+from django.utils import timezone
+
+
+def within_hours(date_time, minutes, opening_time, closing_time, zone=None):
+    """Se a consulta inteira (início e fim) cabe entre a abertura e o fechamento do seu dia.
+
+    Regra única para a validação do agendamento, a grade de horários livres e
+    o impacto de mudanças de horário. A comparação é entre instantes, então a
+    duração conta o tempo real decorrido mesmo em dia de horário de verão.
+    """
+    local = timezone.localtime(date_time, zone)
+    opening = datetime.combine(local.date(), opening_time, tzinfo=local.tzinfo)
+    closing = datetime.combine(local.date(), closing_time, tzinfo=local.tzinfo)
+    return opening <= date_time and date_time + timedelta(minutes=minutes) <= closing
+
 
 class WorkingDay(models.Model):
     WEEKDAY_CHOICES = [
@@ -0,0 +1,154 @@
+"""Limite de requisições por token bucket, guardado no cache do Django.
+
+Cada escopo (``settings.RATE_LIMITS``) tem um balde por IP e outro por
+usuário, no formato ``"quantidade/período"`` (``s``, ``m`` ou ``h``): o balde
+comporta ``quantidade`` requisições seguidas e se recarrega nesse ritmo.
+Quando algum balde esvazia a resposta é 429, com ``Retry-After``.
+
+Os baldes valem para todos os processos só se o cache for compartilhado
+(``CACHE_BACKEND=file`` no prod, ou redis/memcached): no ``LocMemCache``
+cada worker tem os seus, e com 4 workers o limite efetivo chega a 4 vezes o
+configurado (``manage.py check --deploy`` avisa). Mesmo compartilhado, ler e
+gravar o balde não é atômico: requisições simultâneas do mesmo cliente podem
+passar algumas fichas além do limite, o que basta contra força bruta.
+"""
+import math
+import time
+from functools import wraps
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.checks import Warning
+from django.http import HttpResponse
+
+PERIODS = {"s": 1, "m": 60, "h": 60 * 60}
+
+
+def parse_rate(rate):
+    """``"10/m"`` -> ``(10, 10 / 60)``: capacidade e fichas recarregadas por segundo."""
+    count, period = rate.split("/")
+    count = int(count)
+    return count, count / PERIODS[period]
+
+
+def client_ip(request):
+    # Atrás de proxy, RATE_LIMIT_IP_META aponta para o cabeçalho com o IP real
+    return request.META.get(settings.RATE_LIMIT_IP_META, "") or request.META.get("REMOTE_ADDR", "")
+
+
+def take(state, now, capacity, refill):
+    """Tira uma ficha do balde; devolve ``(novo estado, segundos de espera)``.
+
+    ``state`` é ``(fichas, instante)`` ou ``None`` para balde cheio.
+    """
+    tokens, updated = state or (capacity, now)
+    tokens = min(capacity, tokens + (now - updated) * refill)
+
+    if tokens >= 1:
+        return (tokens - 1, now), 0
+    return (tokens, now), (1 - tokens) / refill
+
+
+def _buckets(scope, ip, account):
+    rates = settings.RATE_LIMITS.get(scope, {})
+    buckets = {}
+    if "ip" in rates and ip:
+        buckets[f"ratelimit:{scope}:ip:{ip}"] = parse_rate(rates["ip"])
+    if "user" in rates and account:
+        buckets[f"ratelimit:{scope}:user:{account}"] = parse_rate(rates["user"])
+    return buckets
+
+
+def _consume(buckets, states, now):
+    updates = {}
+    wait = 0
+    for key, (capacity, refill) in buckets.items():
+        updates[key], key_wait = take(states.get(key), now, capacity, refill)
+        wait = max(wait, key_wait)
+
+    # Sem acesso por mais tempo do que leva para encher, o balde some do cache (= cheio)
+    timeout = math.ceil(max(capacity / refill for capacity, refill in buckets.values()))
+    return updates, wait, timeout
+
+
+def _account(user, request, account_field):
+    if user.is_authenticated:
+        return user.pk
+    if account_field:
+        return request.POST.get(account_field, "").strip().lower()
+    return ""
+
+
+def check(scope, ip, account):
+    """Consome uma ficha de cada balde do escopo; devolve a espera (0 = liberado)."""
+    buckets = _buckets(scope, ip, account)
+    if not buckets:
+        return 0
+
+    updates, wait, timeout = _consume(buckets, cache.get_many(list(buckets)), time.time())
+    cache.set_many(updates, timeout)
+    return wait
+
+
+async def acheck(scope, ip, account):
+    buckets = _buckets(scope, ip, account)
+    if not buckets:
+        return 0
+
+    updates, wait, timeout = _consume(buckets, await cache.aget_many(list(buckets)), time.time())
+    await cache.aset_many(updates, timeout)
+    return wait
+
+
+def too_many_requests(wait):
+    response = HttpResponse(
+        "Muitas tentativas em pouco tempo. Aguarde um instante e tente novamente.",
+        status=429,
+        content_type="text/plain; charset=utf-8"
+    )
+    response["Retry-After"] = str(math.ceil(wait))
+    return response
+
+
+def rate_limit(scope, methods=("POST",), account_field=None):
+    """Limita a view pelos baldes de ``scope`` nos métodos ``methods``.
+
+    O balde de usuário usa o usuário logado ou, sem login, o valor do campo
+    ``account_field`` do POST (ex.: o e-mail no login, contra tentativas em
+    massa numa mesma conta a partir de vários IPs).
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                if request.method in methods:
+                    account = _account(await request.auser(), request, account_field)
+                    wait = await acheck(scope, client_ip(request), account)
+                    if wait:
+                        return too_many_requests(wait)
+                return await view(request, *args, **kwargs)
+        else:
+            @wraps(view)
+            def wrapper(request, *args, **kwargs):
+                if request.method in methods:
+                    account = _account(request.user, request, account_field)
+                    wait = check(scope, client_ip(request), account)
+                    if wait:
+                        return too_many_requests(wait)
+                return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def check_shared_cache(app_configs, **kwargs):
+    """Avisa (no ``check --deploy``) quando os baldes ficam num cache por processo."""
+    if not settings.RATE_LIMITS:
+        return []
+    if settings.CACHES["default"]["BACKEND"] != "django.core.cache.backends.locmem.LocMemCache":
+        return []
+    return [Warning(
+        "RATE_LIMITS com LocMemCache: cada worker tem os próprios baldes e o "
+        "limite efetivo é multiplicado pelo número de workers.",
+        hint="Use um cache compartilhado (CACHE_BACKEND=file).",
+        id="appointments.W002",
+    )]
@@ -0,0 +1,66 @@
+from collections import Counter
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from ..models import Appointment, ArchivedAppointment, Patient
+
+# Só consultas encerradas saem da tabela principal
+ARCHIVABLE_STATUSES = ("DONE", "CANCELED", "NO_SHOW")
+
+
+def archive_cutoff(days=None):
+    if days is None:
+        days = settings.APPOINTMENT_ARCHIVE_AFTER_DAYS
+    return timezone.now() - timedelta(days=days)
+
+
+def archive_appointments(cutoff, chunk_size=1000):
+    """Move para o arquivo, em lotes, os agendamentos encerrados anteriores a ``cutoff``.
+
+    Cada lote roda na sua própria transação e soma as concluídas e faltas
+    nos totais de arquivo do paciente; devolve o total de linhas movidas.
+    """
+    candidates = Appointment.objects.filter(
+        date_time__lt=cutoff,
+        status__in=ARCHIVABLE_STATUSES
+    ).order_by("pk")
+
+    moved = 0
+    while True:
+        with transaction.atomic():
+            rows = list(candidates.values(
+                "pk", "patient_id", "procedure_id", "date_time", "status", "created_at"
+            )[:chunk_size])
+            if not rows:
+                break
+
+            ArchivedAppointment.objects.bulk_create([
+                ArchivedAppointment(
+                    original_id=row["pk"],
+                    patient_id=row["patient_id"],
+                    procedure_id=row["procedure_id"],
+                    date_time=row["date_time"],
+                    status=row["status"],
+                    created_at=row["created_at"],
+                )
+                for row in rows
+            ])
+            # Delete em queryset: não passa pelo Appointment.delete, então o
+            # consolidado diário continua contando o histórico arquivado
+            Appointment.objects.filter(pk__in=[row["pk"] for row in rows]).delete()
+
+            counts = Counter((row["patient_id"], row["status"]) for row in rows)
+            for patient_id in {patient_id for patient_id, _ in counts}:
+                done = counts[(patient_id, "DONE")]
+                no_show = counts[(patient_id, "NO_SHOW")]
+                if done or no_show:
+                    Patient.objects.filter(pk=patient_id).update(
+                        archived_done=F("archived_done") + done,
+                        archived_no_show=F("archived_no_show") + no_show,
+                    )
+
+        moved += len(rows)
+
+    return moved
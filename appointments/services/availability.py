@@ -0,0 +1,344 @@
+"""Cálculo de horários livres em minutos inteiros.
+
+Todo o cálculo é feito com deslocamentos em minutos a partir do início do dia
+local (``day_origin``), que é um instante UTC. Como os deslocamentos medem
+tempo real decorrido, a aritmética continua certa em dias com mudança de
+horário de verão. Só os horários que vão para a tela são convertidos de volta
+para ``datetime`` com fuso, pela camada de conversão abaixo (``zoneinfo``).
+"""
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone as dt_timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+from django.conf import settings
+from django.utils import timezone
+from ..models import Appointment, Procedure, SpecialDay, WorkingDay
+
+SLOT_STEP_MINUTES = 30
+SLOT_POLICIES = ("chronological", "best_fit")
+
+
+# --- Camada de conversão (zoneinfo) ---------------------------------------
+
+def clinic_zone():
+    return ZoneInfo(settings.TIME_ZONE)
+
+
+def day_origin(date, zone):
+    """Primeiro instante (UTC) do dia ``date`` no fuso ``zone``.
+
+    Se a meia-noite não existe (início do horário de verão), ``fold=0`` faz o
+    zoneinfo usar o deslocamento anterior, o que cai justamente no instante da
+    transição, ou seja, no primeiro instante que existe naquele dia.
+    """
+    return datetime(date.year, date.month, date.day, tzinfo=zone).astimezone(dt_timezone.utc)
+
+
+def wall_offset(date, wall_time, origin, zone):
+    """Minutos entre ``origin`` e o horário de parede ``wall_time`` em ``date``."""
+    instant = datetime.combine(date, wall_time, tzinfo=zone).astimezone(dt_timezone.utc)
+    return int((instant - origin).total_seconds()) // 60
+
+
+def instant_offset(value, origin, ceil=False):
+    seconds = int((value - origin).total_seconds())
+    if ceil:
+        return -(-seconds // 60)
+    return seconds // 60
+
+
+def offset_instant(origin, offset, zone):
+    return (origin + timedelta(minutes=offset)).astimezone(zone)
+
+
+# --- Núcleo em minutos inteiros ---------------------------------------------
+
+def merge_busy(intervals):
+    """Ordena e junta (na própria lista) intervalos ``(início, fim)`` que se sobrepõem."""
+    intervals.sort()
+    merged = 0
+    for start, end in intervals:
+        if merged and start <= intervals[merged - 1][1]:
+            if end > intervals[merged - 1][1]:
+                intervals[merged - 1] = (intervals[merged - 1][0], end)
+        else:
+            intervals[merged] = (start, end)
+            merged += 1
+    del intervals[merged:]
+    return intervals
+
+
+def free_offsets(opening, closing, duration, busy, not_before, step=SLOT_STEP_MINUTES):
+    """Inícios livres, de ``step`` em ``step`` minutos a partir de ``opening``.
+
+    ``busy`` precisa estar ordenado e sem sobreposição (veja ``merge_busy``).
+    """
+    slots = []
+    index = 0
+    total = len(busy)
+    start = opening
+
+    while start + duration <= closing:
+        end = start + duration
+
+        # Intervalos que terminam antes deste início nunca mais importam
+        while index < total and busy[index][1] <= start:
+            index += 1
+
+        if start >= not_before and (index == total or busy[index][0] >= end):
+            slots.append(start)
+
+        start += step
+
+    return slots
+
+
+@lru_cache(maxsize=64)
+def fill_table(durations, limit, step=SLOT_STEP_MINUTES):
+    """``table[n]``: quanto de ``n`` minutos livres, a partir de um início da grade, dá para ocupar.
+
+    Consultas só começam nos inícios da grade (de ``step`` em ``step``), então
+    depois de uma consulta de ``d`` minutos a próxima começa ``ceil(d / step)``
+    passos adiante.
+    """
+    table = [0] * (limit + 1)
+    for length in range(1, limit + 1):
+        best = table[length - step] if length >= step else 0
+        for minutes in durations:
+            if minutes <= length:
+                rest = length - -(-minutes // step) * step
+                best = max(best, minutes + (table[rest] if rest > 0 else 0))
+        table[length] = best
+    return table
+
+
+def gap_waste(start, end, opening, fill, step=SLOT_STEP_MINUTES):
+    """Minutos livres de ``[start, end)`` que nenhuma combinação de consultas na grade ocupa."""
+    first = start + (opening - start) % step
+    length = end - first
+    return (end - start) - (fill[length] if length > 0 else 0)
+
+
+def best_fit_offsets(offsets, duration, busy, opening, closing, durations, not_before=None):
+    """Pares ``(início, nota)`` em ordem de melhor encaixe (menor nota primeiro).
+
+    A nota é ``(desperdício, folga na borda, sobra)``:
+
+    - desperdício: minutos livres, antes e depois da consulta, que nenhuma
+      combinação de procedimentos do catálogo (``durations``) consegue ocupar;
+    - folga na borda: distância até o vizinho mais próximo, para a consulta
+      encostar em outra (ou na abertura/fechamento) em vez de partir o intervalo;
+    - sobra: tamanho do intervalo livre que resta, preferindo o menor que
+      comporta a consulta e preservando os grandes para procedimentos longos.
+
+    Empates ficam em ordem cronológica. ``busy`` como em ``free_offsets``.
+    """
+    fill = fill_table(tuple(sorted(set(durations))), max(closing - opening, 0))
+    # Tempo que já passou não conta como sobra
+    floor = opening if not_before is None else max(opening, not_before)
+    ends = [end for _, end in busy]
+    starts = [start for start, _ in busy]
+
+    ranked = []
+    for start in offsets:
+        end = start + duration
+        # Vizinhos livres: o intervalo ocupado que termina antes e o que começa depois
+        previous = bisect_right(ends, start)
+        following = bisect_left(starts, end)
+        # Agendamentos fora do expediente (o horário mudou depois) não
+        # estendem o intervalo além da abertura e do fechamento
+        gap_start = min(max(ends[previous - 1] if previous else opening, floor), closing)
+        gap_end = max(min(starts[following] if following < len(starts) else closing, closing), opening)
+        before, after = start - gap_start, gap_end - end
+        waste = gap_waste(gap_start, start, opening, fill) + gap_waste(end, gap_end, opening, fill)
+        ranked.append((start, (waste, min(before, after), before + after)))
+
+    ranked.sort(key=lambda item: (item[1], item[0]))
+    return ranked
+
+
+def _day_offsets(date, opening_time, closing_time, busy_rows, now, zone):
+    origin = day_origin(date, zone)
+    opening = wall_offset(date, opening_time, origin, zone)
+    closing = wall_offset(date, closing_time, origin, zone)
+
+    busy = merge_busy([
+        (instant_offset(start, origin), instant_offset(start, origin, ceil=True) + minutes)
+        for start, minutes in busy_rows
+    ])
+    not_before = instant_offset(now, origin, ceil=True)
+
+    return origin, opening, closing, busy, not_before
+
+
+def compute_slots(date, opening_time, closing_time, duration, busy_rows, now, zone):
+    """Horários livres (``datetime`` com fuso) para uma regra de funcionamento.
+
+    ``busy_rows`` são pares ``(date_time, duração em minutos)`` dos agendamentos
+    que ocupam horário no dia.
+    """
+    origin, opening, closing, busy, not_before = _day_offsets(
+        date, opening_time, closing_time, busy_rows, now, zone
+    )
+
+    return [
+        offset_instant(origin, offset, zone)
+        for offset in free_offsets(opening, closing, duration, busy, not_before)
+    ]
+
+
+def rank_slots(date, opening_time, closing_time, duration, busy_rows, now, zone, durations):
+    """Como ``compute_slots``, mas em pares ``(datetime, nota)`` por melhor encaixe."""
+    origin, opening, closing, busy, not_before = _day_offsets(
+        date, opening_time, closing_time, busy_rows, now, zone
+    )
+    offsets = free_offsets(opening, closing, duration, busy, not_before)
+    ranked = best_fit_offsets(offsets, duration, busy, opening, closing, durations, not_before)
+
+    return [(offset_instant(origin, offset, zone), score) for offset, score in ranked]
+
+
+# --- Acesso ao banco ----------------------------------------------------------
+
+def rule_hours(rule):
+    if not rule or not rule.is_open or not rule.opening_time or not rule.closing_time:
+        return None  # Clínica fechada nesse dia
+    return rule.opening_time, rule.closing_time
+
+
+def opening_hours(date):
+    # verifica se tem dia especial
+    special = SpecialDay.objects.filter(date=date).first()
+    if special:
+        return rule_hours(special)
+
+    return rule_hours(WorkingDay.objects.filter(weekday=date.weekday(), is_open=True).first())
+
+
+async def aopening_hours(date):
+    special = await SpecialDay.objects.filter(date=date).afirst()
+    if special:
+        return rule_hours(special)
+
+    return rule_hours(await WorkingDay.objects.filter(weekday=date.weekday(), is_open=True).afirst())
+
+
+def opening_hours_by_date(start, end):
+    """``opening_hours`` de cada dia do intervalo, com as regras lidas uma vez só."""
+    working_days = {
+        day.weekday: day for day in WorkingDay.objects.filter(is_open=True)
+    }
+    special_days = {
+        day.date: day for day in SpecialDay.objects.filter(date__range=(start, end))
+    }
+
+    result = {}
+    current = start
+    while current <= end:
+        special = special_days.get(current)
+        result[current] = rule_hours(special if special else working_days.get(current.weekday()))
+        current += timedelta(days=1)
+    return result
+
+
+def _busy_rows(date, patient):
+    # Agendamentos do dia uma vez só (reservas do próprio paciente não bloqueiam)
+    appointments = Appointment.objects.occupying().filter(date_time__date=date)
+
+    if patient is not None:
+        appointments = appointments.exclude(status="HELD", patient=patient)
+
+    return appointments.values_list("date_time", "procedure__duration_minutes")
+
+
+def busy_intervals(date, patient=None):
+    return list(_busy_rows(date, patient))
+
+
+async def abusy_intervals(date, patient=None):
+    return [row async for row in _busy_rows(date, patient)]
+
+
+def catalog_durations():
+    return list(Procedure.objects.values_list("duration_minutes", flat=True).distinct())
+
+
+async def acatalog_durations():
+    return [minutes async for minutes in Procedure.objects.values_list("duration_minutes", flat=True).distinct()]
+
+
+def _slot_times(date, hours, procedure, busy):
+    if hours is None:
+        return []
+
+    slots = compute_slots(
+        date,
+        hours[0],
+        hours[1],
+        procedure.duration_minutes,
+        busy,
+        timezone.now(),
+        clinic_zone(),
+    )
+    return [slot.time() for slot in slots]
+
+
+def _offer(date, hours, procedure, busy, durations):
+    if hours is None:
+        return [], set()
+
+    ranked = rank_slots(
+        date,
+        hours[0],
+        hours[1],
+        procedure.duration_minutes,
+        busy,
+        timezone.now(),
+        clinic_zone(),
+        durations,
+    )
+    slots = sorted(slot.time() for slot, _ in ranked)
+
+    # Só destaca quando há diferença entre os horários
+    best = ranked[0][1] if ranked else None
+    recommended = {slot.time() for slot, score in ranked if score == best}
+    if len(recommended) == len(slots):
+        recommended = set()
+    return slots, recommended
+
+
+def generate_available_slots(date, procedure, patient=None):
+    hours = opening_hours(date)
+    busy = busy_intervals(date, patient) if hours else []
+    return _slot_times(date, hours, procedure, busy)
+
+
+async def agenerate_available_slots(date, procedure, patient=None):
+    hours = await aopening_hours(date)
+    busy = await abusy_intervals(date, patient) if hours else []
+    return _slot_times(date, hours, procedure, busy)
+
+
+def offer_slots(date, procedure, patient=None):
+    """Horários livres em ordem cronológica e os recomendados (``SLOT_POLICY``).
+
+    Na política ``best_fit`` os recomendados são os que deixam menos tempo
+    inaproveitável na agenda; na ``chronological`` nenhum é destacado.
+    """
+    if settings.SLOT_POLICY != "best_fit":
+        return generate_available_slots(date, procedure, patient), set()
+
+    hours = opening_hours(date)
+    if hours is None:
+        return [], set()
+    return _offer(date, hours, procedure, busy_intervals(date, patient), catalog_durations())
+
+
+async def aoffer_slots(date, procedure, patient=None):
+    if settings.SLOT_POLICY != "best_fit":
+        return await agenerate_available_slots(date, procedure, patient), set()
+
+    hours = await aopening_hours(date)
+    if hours is None:
+        return [], set()
+    return _offer(date, hours, procedure, await abusy_intervals(date, patient), await acatalog_durations())
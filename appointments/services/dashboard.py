@@ -0,0 +1,78 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Min, Q, Subquery
+from django.utils import timezone
+from ..models import Appointment, Patient
+from ..models.patient import summary_cache_key
+
+
+def upcoming_appointments(patient, limit=None):
+    if limit is None:
+        limit = settings.HOME_UPCOMING_LIMIT
+
+    return (
+        Appointment.objects
+        .filter(patient=patient, status="SCHEDULED", date_time__gte=timezone.now())
+        .select_related("procedure")
+        .only("date_time", "status", "procedure__name", "procedure__duration_minutes")
+        .order_by("date_time")[:limit]
+    )
+
+
+def _archived_count(patient, field):
+    # Total do arquivo guardado no paciente, embutido na mesma consulta do
+    # resumo: a tabela de arquivo fica fora da home
+    return Subquery(Patient.objects.filter(pk=patient.pk).values(field))
+
+
+def _summary_aggregates(patient):
+    upcoming = Q(status="SCHEDULED", date_time__gte=timezone.now())
+
+    return {
+        "upcoming": Count("pk", filter=upcoming),
+        "done": Count("pk", filter=Q(status="DONE")) + _archived_count(patient, "archived_done"),
+        "missed": Count("pk", filter=Q(status="NO_SHOW")) + _archived_count(patient, "archived_no_show"),
+        "next_upcoming": Min("date_time", filter=upcoming),
+    }
+
+
+def compute_summary(patient):
+    return Appointment.objects.filter(patient=patient).aggregate(**_summary_aggregates(patient))
+
+
+async def acompute_summary(patient):
+    return await Appointment.objects.filter(patient=patient).aaggregate(**_summary_aggregates(patient))
+
+
+def _summary_timeout(summary):
+    timeout = settings.HOME_SUMMARY_CACHE_SECONDS
+
+    # A contagem de "próximas" vence quando a consulta mais próxima começa
+    if summary["next_upcoming"]:
+        seconds_left = (summary["next_upcoming"] - timezone.now()).total_seconds()
+        timeout = max(1, min(timeout, int(seconds_left)))
+
+    return timeout
+
+
+def patient_summary(patient):
+    """Resumo (próximas, concluídas, faltas) do paciente, em cache até a próxima mudança."""
+    key = summary_cache_key(patient.pk)
+    summary = cache.get(key)
+
+    if summary is None:
+        summary = compute_summary(patient)
+        cache.set(key, summary, _summary_timeout(summary))
+
+    return summary
+
+
+async def apatient_summary(patient):
+    key = summary_cache_key(patient.pk)
+    summary = await cache.aget(key)
+
+    if summary is None:
+        summary = await acompute_summary(patient)
+        await cache.aset(key, summary, _summary_timeout(summary))
+
+    return summary
@@ -0,0 +1,233 @@
+"""Impacto de mudanças no horário de funcionamento sobre os agendamentos futuros.
+
+Para uma regra proposta (``WorkingDay`` ou ``SpecialDay`` ainda não salvo),
+uma única consulta por intervalo traz os agendamentos (e reservas) que a regra
+governa, e a checagem de horário é a mesma do ``Appointment.clean``
+(``within_hours``).
+Regras removidas (ou que mudam de dia) deixam os seus dias com a regra que
+sobra. Os agendamentos afetados podem ser remarcados ou cancelados em lote.
+"""
+from collections import Counter, defaultdict
+from datetime import timedelta
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from ..models import Appointment, DailyCapacity, DailyStat, SpecialDay, WorkingDay
+from ..models.patient import summary_cache_key
+from ..models.report import open_minutes_for
+from ..models.schedule import within_hours
+from .availability import (
+    clinic_zone, day_origin, free_offsets, instant_offset, merge_busy,
+    offset_instant, opening_hours_by_date, rule_hours, wall_offset,
+)
+
+# Quantos dias à frente a remarcação procura um horário livre
+RESCHEDULE_SEARCH_DAYS = 14
+
+
+def _governed_by(rule, now):
+    """Agendamentos futuros cujo horário é decidido por ``rule`` (uma consulta).
+
+    Inclui as reservas ainda válidas: elas ocupam o horário e podem ser
+    confirmadas depois que a regra mudar.
+    """
+    appointments = Appointment.objects.occupying(now).filter(
+        date_time__gte=now
+    ).select_related("procedure", "patient__user").order_by("date_time")
+
+    if isinstance(rule, SpecialDay):
+        return appointments.filter(date_time__date=rule.date)
+
+    # Dias especiais têm regra própria e não mudam com o dia da semana
+    return appointments.filter(
+        date_time__iso_week_day=rule.weekday + 1
+    ).exclude(
+        date_time__date__in=SpecialDay.objects.values("date")
+    )
+
+
+def fits(appointment, hours, zone):
+    """Se o agendamento inteiro (início e fim) cabe em ``hours`` no seu dia (mesma regra do ``clean``)."""
+    if hours is None:
+        return False
+    return within_hours(appointment.date_time, appointment.procedure.duration_minutes, *hours, zone)
+
+
+def affected_appointments(rule, now=None):
+    """Agendamentos futuros que ficariam fora do horário se ``rule`` fosse salva."""
+    zone = clinic_zone()
+    hours = rule_hours(rule)
+    return [
+        appointment
+        for appointment in _governed_by(rule, now or timezone.now())
+        if not fits(appointment, hours, zone)
+    ]
+
+
+def fallback_hours(rule):
+    """Horário que passa a valer nos dias de ``rule`` quando ela deixa de existir."""
+    if isinstance(rule, SpecialDay):
+        return rule_hours(WorkingDay.objects.filter(weekday=rule.date.weekday(), is_open=True).first())
+    # Sem regra para o dia da semana, a clínica fica fechada
+    return None
+
+
+def affected_by_removal(rule, now=None):
+    """Agendamentos futuros que ficariam fora do horário se ``rule`` (salva) saísse dos seus dias."""
+    zone = clinic_zone()
+    hours = fallback_hours(rule)
+    return [
+        appointment
+        for appointment in _governed_by(rule, now or timezone.now())
+        if not fits(appointment, hours, zone)
+    ]
+
+
+def refresh_capacity(rule):
+    """Atualiza a capacidade diária já registrada dos dias governados por ``rule``."""
+    capacities = DailyCapacity.objects.filter(date__gte=timezone.localdate())
+
+    if isinstance(rule, SpecialDay):
+        capacities = capacities.filter(date=rule.date)
+    else:
+        capacities = capacities.filter(date__iso_week_day=rule.weekday + 1).exclude(
+            date__in=SpecialDay.objects.values("date")
+        )
+
+    for capacity in capacities:
+        capacity.open_minutes = open_minutes_for(capacity.date)
+        capacity.save(update_fields=["open_minutes"])
+
+
+def _forget_summaries(appointments):
+    cache.delete_many([
+        summary_cache_key(patient_id)
+        for patient_id in {appointment.patient_id for appointment in appointments}
+    ])
+
+
+def _lock_occupying(ids):
+    now = timezone.now()
+    return list(
+        Appointment.objects.select_for_update()
+        .occupying(now)
+        .filter(pk__in=ids, date_time__gte=now)
+        .select_related("procedure")
+        .order_by("date_time")
+    )
+
+
+def cancel_appointments(ids):
+    """Cancela em lote (um UPDATE), mantendo o consolidado diário; devolve os cancelados."""
+    with transaction.atomic():
+        appointments = _lock_occupying(ids)
+        Appointment.objects.filter(
+            pk__in=[appointment.pk for appointment in appointments]
+        ).update(status="CANCELED")
+
+        groups = Counter(
+            (timezone.localdate(appointment.date_time), appointment.procedure, appointment.status)
+            for appointment in appointments
+        )
+        for (date, procedure, status), count in groups.items():
+            DailyStat.apply(date, procedure, status, -count)
+            DailyStat.apply(date, procedure, "CANCELED", count)
+
+    _forget_summaries(appointments)
+    return appointments
+
+
+def reschedule_appointments(ids, search_days=RESCHEDULE_SEARCH_DAYS):
+    """Move cada agendamento para o horário livre mais próximo, a partir do mesmo dia.
+
+    Horários e ocupação da janela inteira são lidos uma vez (uma consulta
+    cada) e os encaixes são calculados em minutos inteiros, sem passar pelo
+    ``Appointment.clean`` de cada linha. Devolve ``(remarcados, sem_horario)``.
+    """
+    zone = clinic_zone()
+    now = timezone.now()
+
+    with transaction.atomic():
+        appointments = _lock_occupying(ids)
+        if not appointments:
+            return [], []
+
+        first = timezone.localtime(appointments[0].date_time, zone).date()
+        last = timezone.localtime(appointments[-1].date_time, zone).date() + timedelta(days=search_days)
+        hours_by_date = opening_hours_by_date(first, last)
+
+        busy_rows = Appointment.objects.occupying(now).filter(
+            date_time__date__range=(first, last)
+        ).exclude(
+            pk__in=[appointment.pk for appointment in appointments]
+        ).values_list("date_time", "procedure__duration_minutes")
+
+        origins = {}
+        busy = defaultdict(list)
+        for start, minutes in busy_rows:
+            date = timezone.localtime(start, zone).date()
+            origin = origins.setdefault(date, day_origin(date, zone))
+            busy[date].append((instant_offset(start, origin), instant_offset(start, origin, ceil=True) + minutes))
+        for intervals in busy.values():
+            merge_busy(intervals)
+
+        moved, unplaced = [], []
+        for appointment in appointments:
+            old_date_time = appointment.date_time
+            new_date_time = _nearest_free(appointment, hours_by_date, busy, origins, now, zone, search_days)
+
+            if new_date_time is None:
+                unplaced.append(appointment)
+                continue
+
+            appointment.date_time = new_date_time
+            moved.append((appointment, old_date_time))
+
+        Appointment.objects.bulk_update([appointment for appointment, _ in moved], ["date_time"])
+
+        shifts = Counter()
+        for appointment, old_date_time in moved:
+            old_date = timezone.localdate(old_date_time)
+            new_date = timezone.localdate(appointment.date_time)
+            if old_date != new_date:
+                shifts[(old_date, appointment.procedure, appointment.status)] -= 1
+                shifts[(new_date, appointment.procedure, appointment.status)] += 1
+        for (date, procedure, status), count in shifts.items():
+            if count:
+                DailyStat.apply(date, procedure, status, count)
+
+    moved = [appointment for appointment, _ in moved]
+    _forget_summaries(moved)
+    return moved, unplaced
+
+
+def _nearest_free(appointment, hours_by_date, busy, origins, now, zone, search_days):
+    duration = appointment.procedure.duration_minutes
+    local = timezone.localtime(appointment.date_time, zone)
+    wanted = local.time()
+
+    for days in range(search_days + 1):
+        date = local.date() + timedelta(days=days)
+        hours = hours_by_date.get(date)
+        if hours is None:
+            continue
+
+        origin = origins.setdefault(date, day_origin(date, zone))
+        offsets = free_offsets(
+            wall_offset(date, hours[0], origin, zone),
+            wall_offset(date, hours[1], origin, zone),
+            duration,
+            busy[date],
+            instant_offset(now, origin, ceil=True),
+        )
+        if not offsets:
+            continue
+
+        # O mais perto possível do horário de parede original
+        target = wall_offset(date, wanted, origin, zone)
+        offset = min(offsets, key=lambda candidate: (abs(candidate - target), candidate))
+        busy[date].append((offset, offset + duration))
+        merge_busy(busy[date])
+        return offset_instant(origin, offset, zone)
+
+    return None
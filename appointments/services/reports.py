@@ -0,0 +1,202 @@
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q, Sum
+from django.db.models.functions import TruncDate, TruncWeek
+from django.utils import timezone
+from ..models import Appointment, ArchivedAppointment, DailyCapacity, DailyStat, SpecialDay, WorkingDay
+from ..models.report import OCCUPYING_STATUSES, STATUS_COUNT_FIELDS
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def open_minutes_by_date(start, end):
+    # Carrega as regras de funcionamento uma vez só para todo o intervalo
+    working_days = {
+        day.weekday: day for day in WorkingDay.objects.filter(is_open=True)
+    }
+    special_days = {
+        day.date: day for day in SpecialDay.objects.filter(date__range=(start, end))
+    }
+
+    result = {}
+    current = start
+    while current <= end:
+        special = special_days.get(current)
+        rule = special if special else working_days.get(current.weekday())
+
+        if not rule or not rule.is_open or not rule.opening_time or not rule.closing_time:
+            result[current] = 0
+        else:
+            result[current] = max(_minutes(rule.closing_time) - _minutes(rule.opening_time), 0)
+        current += timedelta(days=1)
+
+    return result
+
+
+def appointment_date_range():
+    """Primeiro e último dia com agendamento, contando o arquivo."""
+    bounds = [
+        model.objects.aggregate(first=Min("date_time"), last=Max("date_time"))
+        for model in (Appointment, ArchivedAppointment)
+    ]
+    firsts = [bound["first"] for bound in bounds if bound["first"]]
+    lasts = [bound["last"] for bound in bounds if bound["last"]]
+    if not firsts:
+        return None, None
+    return timezone.localdate(min(firsts)), timezone.localdate(max(lasts))
+
+
+def _daily_rows(model, range_start, range_end, tz):
+    count_annotations = {
+        field: Count("id", filter=Q(status=status))
+        for status, field in STATUS_COUNT_FIELDS.items()
+    }
+    return (
+        model.objects
+        .filter(date_time__gte=range_start, date_time__lt=range_end)
+        .annotate(day=TruncDate("date_time", tzinfo=tz))
+        .values("day", "procedure")
+        .annotate(
+            **count_annotations,
+            booked_minutes=Sum(
+                "procedure__duration_minutes",
+                filter=Q(status__in=OCCUPYING_STATUSES),
+                default=0,
+            ),
+            revenue=Sum("procedure__price", filter=Q(status="DONE"), default=Decimal("0")),
+        )
+    )
+
+
+def rebuild_daily_stats(start, end):
+    """Recalcula o consolidado de ``start`` até ``end`` (inclusive) a partir dos agendamentos.
+
+    O arquivo entra na conta: arquivar não tira nada do consolidado, então
+    recalcular também não pode tirar.
+    """
+    tz = timezone.get_current_timezone()
+    range_start = timezone.make_aware(datetime.combine(start, time.min), tz)
+    range_end = timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz)
+
+    totals = {}
+    for model in (Appointment, ArchivedAppointment):
+        for row in _daily_rows(model, range_start, range_end, tz):
+            key = (row.pop("day"), row.pop("procedure"))
+            if key in totals:
+                for field, value in row.items():
+                    totals[key][field] += value
+            else:
+                totals[key] = row
+
+    stats = [
+        DailyStat(date=date, procedure_id=procedure, **row)
+        for (date, procedure), row in totals.items()
+    ]
+    capacities = [
+        DailyCapacity(date=date, open_minutes=minutes)
+        for date, minutes in open_minutes_by_date(start, end).items()
+    ]
+
+    with transaction.atomic():
+        DailyStat.objects.filter(date__range=(start, end)).delete()
+        DailyCapacity.objects.filter(date__range=(start, end)).delete()
+        DailyStat.objects.bulk_create(stats, batch_size=500)
+        DailyCapacity.objects.bulk_create(capacities, batch_size=500)
+
+    return len(stats), len(capacities)
+
+
+def daily_open_minutes(start, end):
+    """Minutos abertos de cada dia, do consolidado ou, sem linha ainda, das regras atuais.
+
+    O consolidado incremental só cria a capacidade de dias com agendamento;
+    dias abertos sem nenhuma reserva também contam na ocupação.
+    """
+    minutes = open_minutes_by_date(start, end)
+    minutes.update(
+        DailyCapacity.objects
+        .filter(date__range=(start, end))
+        .values_list("date", "open_minutes")
+    )
+    return minutes
+
+
+def weekly_summary(start, end):
+    totals = (
+        DailyStat.objects
+        .filter(date__range=(start, end))
+        .annotate(week=TruncWeek("date"))
+        .values("week")
+        .annotate(
+            scheduled=Sum("scheduled_count"),
+            canceled=Sum("canceled_count"),
+            done=Sum("done_count"),
+            no_show=Sum("no_show_count"),
+            booked_minutes=Sum("booked_minutes"),
+            revenue=Sum("revenue"),
+        )
+        .order_by("week")
+    )
+    capacity = {}
+    for date, minutes in daily_open_minutes(start, end).items():
+        week = date - timedelta(days=date.weekday())
+        capacity[week] = capacity.get(week, 0) + minutes
+
+    weeks = []
+    for row in totals:
+        open_minutes = capacity.get(row["week"]) or 0
+        attended = row["done"] + row["no_show"]
+        weeks.append({
+            **row,
+            "open_minutes": open_minutes,
+            "utilization": row["booked_minutes"] / open_minutes if open_minutes else None,
+            "no_show_rate": row["no_show"] / attended if attended else None,
+        })
+    return weeks
+
+
+def revenue_by_procedure(start, end):
+    return (
+        DailyStat.objects
+        .filter(date__range=(start, end))
+        .values("procedure__name")
+        .annotate(revenue=Sum("revenue"), done=Sum("done_count"))
+        .order_by("-revenue")
+    )
+
+
+CSV_HEADER = [
+    "data", "procedimento", "agendados", "cancelados", "concluidos",
+    "faltas", "minutos_reservados", "minutos_abertos", "receita",
+]
+
+
+def export_rows(start, end):
+    open_minutes = dict(
+        DailyCapacity.objects
+        .filter(date__range=(start, end))
+        .values_list("date", "open_minutes")
+    )
+
+    yield CSV_HEADER
+    stats = (
+        DailyStat.objects
+        .filter(date__range=(start, end))
+        .select_related("procedure")
+        .order_by("date", "procedure__name")
+    )
+    for stat in stats.iterator(chunk_size=1000):
+        yield [
+            stat.date.isoformat(),
+            stat.procedure.name,
+            stat.scheduled_count,
+            stat.canceled_count,
+            stat.done_count,
+            stat.no_show_count,
+            stat.booked_minutes,
+            open_minutes.get(stat.date, 0),
+            stat.revenue,
+        ]
@@ -0,0 +1,110 @@
+"""Replay do histórico de reservas para comparar políticas de oferta de horários.
+
+Cada dia começa com a agenda vazia e recebe, na ordem em que foram criadas,
+as reservas que de fato ocuparam horário. A cada reserva o paciente escolhe
+ao acaso entre os horários oferecidos: todos (``chronological``) ou só os de
+melhor encaixe (``best_fit``). Reservas que não cabem mais são perdidas.
+"""
+import random
+from collections import defaultdict
+from itertools import chain
+from django.utils import timezone
+from ..models import Appointment, ArchivedAppointment
+from .availability import (
+    SLOT_POLICIES, best_fit_offsets, catalog_durations, clinic_zone, day_origin,
+    fill_table, free_offsets, gap_waste, merge_busy, opening_hours, wall_offset,
+)
+
+# Reservas que ocuparam a cadeira (canceladas e reservas temporárias não entram)
+REPLAYED_STATUSES = ("SCHEDULED", "DONE", "NO_SHOW")
+
+
+def historical_requests(start, end):
+    """Durações pedidas por dia, na ordem de criação, de agendamentos atuais e arquivados."""
+    filters = {
+        "date_time__date__range": (start, end),
+        "status__in": REPLAYED_STATUSES,
+    }
+    fields = ("date_time", "created_at", "procedure__duration_minutes")
+    rows = chain(
+        Appointment.objects.filter(**filters).values_list(*fields),
+        ArchivedAppointment.objects.filter(**filters).values_list(*fields),
+    )
+
+    days = defaultdict(list)
+    for date_time, _, minutes in sorted(rows, key=lambda row: row[1]):
+        days[timezone.localdate(date_time)].append(minutes)
+    return days
+
+
+def idle_minutes(busy, opening, closing, fill):
+    """Minutos livres no fim do dia que nenhum procedimento consegue ocupar."""
+    idle = 0
+    previous = opening
+    for start, end in busy + [(closing, closing)]:
+        idle += gap_waste(previous, start, opening, fill)
+        previous = end
+    return idle
+
+
+def simulate_day(opening, closing, requests, policy, durations, rng):
+    busy = []
+    booked = rejected = 0
+
+    for duration in requests:
+        offsets = free_offsets(opening, closing, duration, busy, opening)
+        if not offsets:
+            rejected += 1
+            continue
+
+        if policy == "best_fit":
+            ranked = best_fit_offsets(offsets, duration, busy, opening, closing, durations)
+            offsets = [offset for offset, score in ranked if score == ranked[0][1]]
+
+        start = rng.choice(offsets)
+        busy.append((start, start + duration))
+        merge_busy(busy)
+        booked += duration
+
+    fill = fill_table(tuple(sorted(set(durations))), max(closing - opening, 0))
+    return {
+        "requests": len(requests),
+        "rejected": rejected,
+        "booked_minutes": booked,
+        "open_minutes": closing - opening,
+        "idle_minutes": idle_minutes(busy, opening, closing, fill),
+    }
+
+
+def simulate(start, end, runs=20, seed=0):
+    """Totais por política, somados nos dias e na média de ``runs`` sorteios."""
+    zone = clinic_zone()
+    durations = catalog_durations()
+    days = []
+
+    for date, requests in sorted(historical_requests(start, end).items()):
+        hours = opening_hours(date)
+        if hours is None:
+            continue
+        origin = day_origin(date, zone)
+        opening = wall_offset(date, hours[0], origin, zone)
+        closing = wall_offset(date, hours[1], origin, zone)
+        days.append((opening, closing, requests))
+
+    results = {}
+    for policy in SLOT_POLICIES:
+        rng = random.Random(seed)
+        totals = defaultdict(int)
+        for _ in range(runs):
+            for opening, closing, requests in days:
+                for key, value in simulate_day(opening, closing, requests, policy, durations, rng).items():
+                    totals[key] += value
+
+        result = {key: value / runs for key, value in totals.items()}
+        result["days"] = len(days)
+        result["utilization"] = (
+            result["booked_minutes"] / result["open_minutes"] if result.get("open_minutes") else 0
+        )
+        results[policy] = result
+
+    return results
@@ -0,0 +1,296 @@
+"""Exportação e restauração em lote dos dados da clínica (JSONL comprimido).
+
+Cada modelo vira um ``<app.modelo>.jsonl.gz`` com uma linha por registro (a
+lista de valores, na ordem de ``fields``), lido do banco em blocos com
+``iterator(chunk_size=...)``, sem montar instâncias nem guardar a tabela
+inteira na memória. O ``manifest.json`` registra, por arquivo, os campos, a
+quantidade de linhas e o sha256 do conteúdo descomprimido: a importação
+confere tudo antes de confirmar a transação, e exportar de novo os dados
+restaurados gera os mesmos checksums.
+
+Usuários vão com grupos, permissões e o histórico do admin. Chaves para
+tabelas que o ``migrate`` preenche (``ContentType``, ``Permission``) têm ids
+diferentes em cada banco, então são gravadas pela chave natural.
+"""
+import gzip
+import hashlib
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from functools import partial
+from pathlib import Path
+from django.contrib.admin.models import LogEntry
+from django.contrib.auth.models import Group, Permission, User
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+from ..models import (
+    Appointment, ArchivedAppointment, DailyCapacity, DailyStat, Patient, Procedure, SpecialDay, WorkingDay,
+)
+
+MANIFEST = "manifest.json"
+FORMAT_VERSION = 1
+
+# Ordem de dependência: quem é referenciado vem antes. Reservas temporárias
+# (HELD) ficam de fora.
+MODELS = [
+    User,
+    Group,
+    Group.permissions.through,
+    User.groups.through,
+    User.user_permissions.through,
+    LogEntry,
+    Procedure,
+    WorkingDay,
+    SpecialDay,
+    Patient,
+    Appointment,
+    ArchivedAppointment,
+    DailyCapacity,
+    DailyStat,
+]
+
+
+def _fields(model):
+    return model._meta.concrete_fields
+
+
+def _attnames(model):
+    return [field.attname for field in _fields(model)]
+
+
+# FKs para estes modelos vão pela chave natural, e não pelo id
+NATURAL_KEYS = {
+    ContentType: ("app_label", "model"),
+    Permission: ("codename", "content_type__app_label", "content_type__model"),
+}
+
+
+def _lookups(model):
+    """Colunas lidas de cada campo: uma só, ou as da chave natural."""
+    return [
+        [f"{field.name}__{key}" for key in NATURAL_KEYS[field.related_model]]
+        if field.related_model in NATURAL_KEYS else [field.attname]
+        for field in _fields(model)
+    ]
+
+
+def _file_name(model):
+    return f"{model._meta.label_lower}.jsonl.gz"
+
+
+def _encode(value):
+    # Sem o corte em milissegundos do DjangoJSONEncoder: a volta tem que ser exata
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Tipo não serializável: {type(value).__name__}")
+
+
+def _rows(model, using):
+    queryset = model._default_manager.using(using).order_by("pk")
+    if model is Appointment:
+        queryset = queryset.exclude(status="HELD")
+    return queryset.values_list(*[lookup for group in _lookups(model) for lookup in group])
+
+
+def _group(row, lookups):
+    """Junta as colunas da chave natural num valor só (``None`` se a FK é nula)."""
+    values, index = [], 0
+    for group in lookups:
+        value = row[index:index + len(group)]
+        if len(group) == 1:
+            values.append(value[0])
+        else:
+            values.append(None if value[0] is None else list(value))
+        index += len(group)
+    return values
+
+
+def export_clinic(directory, chunk_size=2000, using=DEFAULT_DB_ALIAS):
+    """Grava os arquivos e o manifesto em ``directory``; devolve o manifesto."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    entries = []
+
+    with transaction.atomic(using=using):
+        if connections[using].vendor == "postgresql":
+            # Uma fotografia só de todas as tabelas, mesmo com a clínica funcionando
+            with connections[using].cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+
+        for model in MODELS:
+            digest = hashlib.sha256()
+            count = 0
+            # mtime=0: o .gz não muda só porque foi gerado em outro momento
+            with open(directory / _file_name(model), "wb") as raw, \
+                    gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as output:
+                lookups = _lookups(model)
+                for row in _rows(model, using).iterator(chunk_size=chunk_size):
+                    values = _group(row, lookups)
+                    line = (json.dumps(values, default=_encode, ensure_ascii=False) + "\n").encode()
+                    digest.update(line)
+                    output.write(line)
+                    count += 1
+
+            entries.append({
+                "model": model._meta.label_lower,
+                "file": _file_name(model),
+                "fields": _attnames(model),
+                "rows": count,
+                "sha256": digest.hexdigest(),
+            })
+
+    manifest = {
+        "version": FORMAT_VERSION,
+        "created_at": timezone.now().isoformat(),
+        "models": entries,
+    }
+    (directory / MANIFEST).write_text(json.dumps(manifest, indent=2))
+    return manifest
+
+
+def read_manifest(directory):
+    """Entradas do manifesto por modelo, conferindo versão e campos com o schema atual."""
+    path = Path(directory) / MANIFEST
+    try:
+        manifest = json.loads(path.read_text())
+    except (OSError, ValueError) as error:
+        raise ValueError(f"Manifesto inválido em {path}: {error}")
+
+    if manifest.get("version") != FORMAT_VERSION:
+        raise ValueError(f"Versão de exportação não suportada: {manifest.get('version')!r}.")
+
+    entries = {entry["model"]: entry for entry in manifest["models"]}
+    for model in MODELS:
+        entry = entries.get(model._meta.label_lower)
+        if entry is None:
+            raise ValueError(f"{model._meta.label_lower} não está na exportação.")
+        if entry["fields"] != _attnames(model):
+            raise ValueError(
+                f"Os campos de {model._meta.label_lower} mudaram desde a exportação; "
+                "aplique as migrações da mesma versão antes de importar."
+            )
+    return entries
+
+
+def _read(directory, entry):
+    """Linhas decodificadas do arquivo; quantidade e sha256 são conferidos no fim."""
+    digest = hashlib.sha256()
+    count = 0
+    with gzip.open(Path(directory) / entry["file"], "rb") as source:
+        for line in source:
+            digest.update(line)
+            count += 1
+            yield json.loads(line)
+
+    if count != entry["rows"] or digest.hexdigest() != entry["sha256"]:
+        raise ValueError(f"{entry['file']} não confere com o manifesto (linhas ou sha256).")
+
+
+def verify_export(directory):
+    """Só confere os arquivos contra o manifesto; devolve as linhas por modelo."""
+    entries = read_manifest(directory)
+    for entry in entries.values():
+        for _ in _read(directory, entry):
+            pass
+    return {label: entry["rows"] for label, entry in entries.items()}
+
+
+def _resolve(model, pks, value):
+    if value is None:
+        return None
+    try:
+        return pks[tuple(value)]
+    except KeyError:
+        raise ValueError(
+            f"{model._meta.label_lower} {value} não existe neste banco; "
+            "aplique as migrações antes de importar."
+        )
+
+
+def _converters(model, using):
+    """Conversão de cada valor do arquivo para o atributo do modelo."""
+    converters = []
+    for field in _fields(model):
+        related = field.related_model
+        if related in NATURAL_KEYS:
+            pks = {
+                tuple(row[:-1]): row[-1]
+                for row in related._default_manager.using(using).values_list(*NATURAL_KEYS[related], "pk")
+            }
+            converters.append(partial(_resolve, related, pks))
+        else:
+            converters.append(field.to_python)
+    return converters
+
+
+def _insert(model, objs, using):
+    # O que o bulk_create faz, mas em modo raw: sem pre_save, o auto_now_add
+    # (created_at, archived_at) mantém o valor exportado em vez de virar "agora"
+    fields = _fields(model)
+    connection = connections[using]
+    size = connection.ops.bulk_batch_size(fields, objs) or len(objs)
+    for start in range(0, len(objs), size):
+        model._base_manager.using(using)._insert(objs[start:start + size], fields=fields, using=using, raw=True)
+
+
+def _flush(using):
+    for model in reversed(MODELS):
+        # Delete em queryset: não passa pelo Appointment.delete nem mexe no consolidado
+        model._default_manager.using(using).all().delete()
+
+
+def import_clinic(directory, chunk_size=2000, replace=False, using=DEFAULT_DB_ALIAS):
+    """Restaura a exportação em blocos de ``chunk_size``, numa transação só.
+
+    Não passa pelo ``save``/``full_clean`` dos modelos: os dados já foram
+    validados quando entraram, e o consolidado diário vem junto na exportação.
+    As checagens de chave estrangeira ficam para o fim da carga onde o banco
+    permite, como no ``loaddata``. Devolve as linhas restauradas por modelo.
+    """
+    entries = read_manifest(directory)
+    connection = connections[using]
+    loaded = {}
+
+    with transaction.atomic(using=using):
+        if any(model._default_manager.using(using).exists() for model in MODELS):
+            if not replace:
+                raise ValueError("O banco já tem dados da clínica; use --replace para substituí-los.")
+            _flush(using)
+
+        with connection.constraint_checks_disabled():
+            for model in MODELS:
+                entry = entries[model._meta.label_lower]
+                attnames = _attnames(model)
+                converters = _converters(model, using)
+                batch = []
+
+                for values in _read(directory, entry):
+                    batch.append(model(**{
+                        attname: convert(value) for attname, convert, value in zip(attnames, converters, values)
+                    }))
+                    if len(batch) >= chunk_size:
+                        _insert(model, batch, using)
+                        batch = []
+                if batch:
+                    _insert(model, batch, using)
+
+                loaded[model._meta.label_lower] = entry["rows"]
+
+        connection.check_constraints(table_names=[model._meta.db_table for model in MODELS])
+
+        # As chaves vieram da exportação: as sequências continuam depois delas
+        statements = connection.ops.sequence_reset_sql(no_style(), MODELS)
+        if statements:
+            with connection.cursor() as cursor:
+                for statement in statements:
+                    cursor.execute(statement)
+
+        # Perfis e resumos em cache apontam para os dados substituídos
+        transaction.on_commit(cache.clear, using=using)
+
+    return loaded
@@ -0,0 +1,12 @@
+from django.shortcuts import render
+
+
+async def arender(request, template_name, context=None):
+    """``render`` para views assíncronas.
+
+    Os context processors leem ``request.user``, que é carregado de forma
+    preguiçosa e síncrona; aqui ele é resolvido antes, pelo caminho assíncrono.
+    O contexto já deve vir avaliado (listas, não querysets).
+    """
+    request.user = await request.auser()
+    return render(request, template_name, context)
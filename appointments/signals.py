@@ -0,0 +1,17 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .backends import user_cache_key
+from .middleware import profile_cache_key
+from .models import Patient
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    cache.delete_many([user_cache_key(instance.pk), profile_cache_key(instance.pk)])
+
+
+@receiver([post_save, post_delete], sender=Patient)
+def invalidate_patient_cache(sender, instance, **kwargs):
+    cache.delete(profile_cache_key(instance.user_id))
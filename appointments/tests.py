@@ -1,3 +1,971 @@
-from django.test import TestCase
+import random
+import tempfile
+from unittest import skipUnless
+from unittest import mock
+from io import StringIO
+from pathlib import Path
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo
+from decimal import Decimal
+from django.conf import settings
+from django.contrib.auth.hashers import MD5PasswordHasher
+from django.contrib.admin.models import ADDITION, LogEntry
+from django.contrib.auth.models import Group, Permission, User
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection
+from django.test import Client, TestCase, override_settings
+from django.templatetags.static import static
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from core.middleware import PIN_COOKIE
+from core.profiling import load_profiles
+from core.routers import request_scope
+from . import ratelimit
+from .backends import check_shared_cache
+from .forms.schedule import SpecialDayForm, WorkingDayForm
+from .models import (
+    Appointment, ArchivedAppointment, DailyCapacity, DailyStat, Patient, Procedure, SpecialDay, WorkingDay,
+)
+from .services.archive import archive_appointments, archive_cutoff
+from .services.availability import best_fit_offsets, compute_slots, generate_available_slots
+from .services.impact import affected_appointments, cancel_appointments, reschedule_appointments
+from .services.reports import appointment_date_range, weekly_summary
+from .services.simulation import simulate
+from .services.transfer import export_clinic, import_clinic, verify_export
 
-# Create your tests here.
+
+def make_patient(email="paciente@email.com", cpf="52998224725"):
+    user = User.objects.create_user(username=email, email=email, password="senha-forte-123")
+    return Patient.objects.create(user=user, phone="11999999999", cpf=cpf)
+
+
+def open_every_day(opening=time(8, 0), closing=time(18, 0)):
+    for weekday in range(7):
+        WorkingDay.objects.create(weekday=weekday, opening_time=opening, closing_time=closing)
+
+
+def future_at(hour, minute=0, days=7):
+    date = timezone.localdate() + timedelta(days=days)
+    return timezone.make_aware(datetime.combine(date, time(hour, minute)))
+
+
+def move_to_past(appointment, days=7):
+    Appointment.objects.filter(pk=appointment.pk).update(
+        date_time=appointment.date_time - timedelta(days=days * 2)
+    )
+    return Appointment.objects.get(pk=appointment.pk)
+
+
+class ClinicTestCase(TestCase):
+    """Clínica aberta todo dia das 8h às 18h, com um paciente e o procedimento "Limpeza"."""
+
+    procedure_minutes = 60
+
+    def setUp(self):
+        cache.clear()
+        open_every_day()
+        self.patient = make_patient()
+        self.procedure = Procedure.objects.create(
+            name="Limpeza", description="", price=Decimal("150.00"), duration_minutes=self.procedure_minutes
+        )
+
+
+class DailyStatTests(ClinicTestCase):
+
+    def stat_for(self, date_time):
+        return DailyStat.objects.get(date=timezone.localdate(date_time), procedure=self.procedure)
+
+    def test_status_transitions_update_rollup(self):
+        appointment = Appointment.objects.create(
+            patient=self.patient, procedure=self.procedure, date_time=future_at(9)
+        )
+        stat = self.stat_for(appointment.date_time)
+        self.assertEqual(stat.scheduled_count, 1)
+        self.assertEqual(stat.booked_minutes, 60)
+        self.assertEqual(
+            DailyCapacity.objects.get(date=stat.date).open_minutes, 10 * 60
+        )
+
+        appointment.cancel()
+        stat.refresh_from_db()
+        self.assertEqual((stat.scheduled_count, stat.canceled_count), (0, 1))
+        self.assertEqual(stat.booked_minutes, 0)
+
+    def test_done_adds_revenue_and_rebuild_matches(self):
+        appointment = Appointment.objects.create(
+            patient=self.patient, procedure=self.procedure, date_time=future_at(10)
+        )
+        # Ajuste direto no banco simula a consulta já ter acontecido
+        DailyStat.objects.all().delete()
+        appointment = move_to_past(appointment)
+        call_command("rebuild_daily_stats", stdout=StringIO())
+
+        appointment.mark_done()
+        stat = self.stat_for(appointment.date_time)
+        self.assertEqual((stat.scheduled_count, stat.done_count), (0, 1))
+        self.assertEqual(stat.revenue, Decimal("150.00"))
+
+        incremental = DailyStat.objects.values().get(pk=stat.pk)
+        call_command("rebuild_daily_stats", stdout=StringIO())
+        rebuilt = DailyStat.objects.values().get(date=stat.date, procedure=self.procedure)
+        incremental.pop("id")
+        rebuilt.pop("id")
+        self.assertEqual(incremental, rebuilt)
+
+    def test_dashboard_is_staff_only_and_reads_rollup(self):
+        Appointment.objects.create(
+            patient=self.patient, procedure=self.procedure, date_time=future_at(9, days=2)
+        )
+        url = reverse("appointments:report_dashboard")
+        self.client.force_login(self.patient.user)
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        staff = User.objects.create_user(username="staff", password="x", is_staff=True)
+        self.client.force_login(staff)
+        end = (timezone.localdate() + timedelta(days=7)).isoformat()
+        response = self.client.get(url, {"end_date": end})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["weeks"][0]["scheduled"], 1)
+
+        response = self.client.get(reverse("appointments:report_export"), {"end_date": end})
+        rows = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(rows), 2)
+        self.assertIn("Limpeza", rows[1])
+
+    def test_weekly_capacity_counts_open_days_without_bookings(self):
+        monday = timezone.localdate() + timedelta(days=7 - timezone.localdate().weekday())
+        Appointment.objects.create(
+            patient=self.patient, procedure=self.procedure,
+            date_time=timezone.make_aware(datetime.combine(monday, time(9, 0))),
+        )
+        # Só a segunda tem agendamento (e linha de capacidade); a semana toda está aberta
+        self.assertEqual(DailyCapacity.objects.filter(date__range=(monday, monday + timedelta(days=6))).count(), 1)
+
+        week = weekly_summary(monday, monday + timedelta(days=6))[0]
+        self.assertEqual(week["open_minutes"], 7 * 10 * 60)
+        self.assertAlmostEqual(week["utilization"], 60 / (7 * 10 * 60))
+
+
+class ArchiveTests(ClinicTestCase):
+    procedure_minutes = 30
+
+    def make_old(self, hour, status, days_ago):
+        appointment = Appointment.objects.create(
+            patient=self.patient, procedure=self.procedure, date_time=future_at(hour)
+        )
+        Appointment.objects.filter(pk=appointment.pk).update(
+            date_time=appointment.date_time - timedelta(days=days_ago + 7),
+            status=status,
+        )
+        return appointment
+
+    def test_archive_moves_only_old_closed_rows_in_chunks(self):
+        self.make_old(9, "DONE", days_ago=1000)
+        self.make_old(10, "NO_SHOW", days_ago=1000)
+        self.make_old(11, "CANCELED", days_ago=1000)
+        recent = self.make_old(12, "DONE", days_ago=10)
+        scheduled = Appointment.objects.create(
+            patient=self.patient, procedure=self.procedure, date_time=future_at(13)
+        )
+
+        moved = archive_appointments(archive_cutoff(730), chunk_size=2)
+
+        self.assertEqual(moved, 3)
+        self.assertEqual(ArchivedAppointment.objects.count(), 3)
+        self.assertQuerySetEqual(
+            Appointment.objects.order_by("pk"), [recent.pk, scheduled.pk], transform=lambda a: a.pk
+        )
+
+    def test_history_reads_live_and_archived_rows(self):
+        self.make_old(9, "DONE", days_ago=1000)
+        self.make_old(10, "NO_SHOW", days_ago=10)
+        archive_appointments(archive_cutoff(730))
+
+        history = list(self.patient.appointment_history())
+        self.assertEqual([row["status"] for row in history], ["DONE", "NO_SHOW"])
+
+        self.client.force_login(self.patient.user)
+        response = self.client.get(reverse("appointments:appointment_history"))
+        self.assertEqual(len(response.context["appointments"]), 2)
+        self.assertContains(response, "Limpeza", count=2)
+
+    def test_rebuild_keeps_archived_rollup(self):
+        old = self.make_old(9, "DONE", days_ago=1000)
+        day = timezone.localdate(Appointment.objects.get(pk=old.pk).date_time)
+        archive_appointments(archive_cutoff(730))
+
+        self.assertEqual(appointment_date_range(), (day, day))
+        call_command("rebuild_daily_stats", "--start", day.isoformat(), "--end", day.isoformat(), stdout=StringIO())
+        stat = DailyStat.objects.get(date=day, procedure=self.procedure)
+        self.assertEqual((stat.done_count, stat.booked_minutes, stat.revenue), (1, 30, Decimal("150.00")))
+        self.assertTrue(DailyCapacity.objects.filter(date=day).exists())
+
+    def test_hot_paths_do_not_touch_archive(self):
+        self.make_old(9, "DONE", days_ago=1000)
+        archive_appointments(archive_cutoff(730))
+        self.client.force_login(self.patient.user)
+        archive_table = ArchivedAppointment._meta.db_table
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("appointments:home"))
+            self.client.post(reverse("appointments:schedule_appointment"), {
+                "procedure": self.procedure.pk,
+                "date": future_at(9).date().isoformat(),
+            })
+
+        self.assertTrue(queries.captured_queries)
+        for query in queries.captured_queries:
+            self.assertNotIn(archive_table, query["sql"])
+
+
+class HomeDashboardTests(ClinicTestCase):
+    procedure_minutes = 30
+
+    def setUp(self):
+        super().setUp()
+        for hour in range(8, 16):
+            Appointment.objects.create(
+                patient=self.patient, procedure=self.procedure, date_time=future_at(hour)
+            )
+        done = Appointment.objects.create(
+            patient=self.patient, procedure=self.procedure, date_time=future_at(17)
+        )
+        move_to_past(done).mark_done()
+        self.client.force_login(self.patient.user)
+
+    def test_home_shows_bounded_upcoming_window_and_summary(self):
+        response = self.client.get(reverse("appointments:home"))
+
+        self.assertEqual(len(response.context["appointments"]), 5)
+        summary = response.context["summary"]
+        self.assertEqual((summary["upcoming"], summary["done"], summary["missed"]), (8, 1, 0))
+
+    def test_warm_home_query_count(self):
+        self.client.get(reverse("appointments:home"))
+        # Paciente e resumo vêm do cache: só a sessão e o usuário (sem cache
+        # compartilhado, são lidos a cada requisição) e a janela de próximas consultas
+        with self.assertNumQueries(3):
+            self.client.get(reverse("appointments:home"))
+
+    def test_appointment_change_invalidates_summary(self):
+        self.client.get(reverse("appointments:home"))
+        Appointment.objects.filter(status="SCHEDULED").first().cancel()
+
+        response = self.client.get(reverse("appointments:home"))
+        self.assertEqual(response.context["summary"]["upcoming"], 7)
+
+
+class SlotHoldTests(ClinicTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other = make_patient("outro@email.com", cpf="11144477735")
+        self.date_time = future_at(9)
+
+    def available(self, patient):
+        return generate_available_slots(self.date_time.date(), self.procedure, patient)
+
+    def test_hold_blocks_other_patients_until_it_expires(self):
+        hold = Appointment.hold(self.patient, self.procedure, self.date_time)
+
+        self.assertNotIn(time(9, 0), self.available(self.other))
+        self.assertNotIn(time(9, 30), self.available(self.other))
+        self.assertIn(time(9, 0), self.available(self.patient))
+
+        Appointment.objects.filter(pk=hold.pk).update(hold_expires_at=timezone.now())
+        self.assertIn(time(9, 0), self.available(self.other))
+        Appointment.hold(self.other, self.procedure, self.date_time)
+        self.assertFalse(Appointment.objects.filter(pk=hold.pk).exists())
+
+    def test_select_then_confirm_flow(self):
+        self.client.force_login(self.patient.user)
+        response = self.client.post(reverse("appointments:schedule_appointment"), {
+            "procedure": self.procedure.pk,
+            "date": self.date_time.date().isoformat(),
+            "time": "09:00",
+        })
+        hold = response.context["hold"]
+        self.assertEqual(hold.status, "HELD")
+
+        response = self.client.post(reverse("appointments:confirm_appointment", args=[hold.pk]))
+        self.assertRedirects(response, reverse("appointments:home"))
+        hold.refresh_from_db()
+        self.assertEqual((hold.status, hold.hold_expires_at), ("SCHEDULED", None))
+        self.assertEqual(
+            DailyStat.objects.get(procedure=self.procedure).scheduled_count, 1
+        )
+
+    def test_expired_hold_cannot_be_confirmed(self):
+        hold = Appointment.hold(self.patient, self.procedure, self.date_time)
+        Appointment.objects.filter(pk=hold.pk).update(hold_expires_at=timezone.now())
+
+        with self.assertRaises(ValidationError):
+            hold.confirm_hold()
+        self.assertFalse(DailyStat.objects.filter(scheduled_count__gt=0).exists())
+
+    def test_confirm_revalidates_the_slot(self):
+        hold = Appointment.hold(self.patient, self.procedure, self.date_time)
+        # Outra gravação ocupou o horário sem passar pela checagem (corrida)
+        Appointment.objects.bulk_create([Appointment(
+            patient=self.other, procedure=self.procedure, date_time=self.date_time, status="SCHEDULED"
+        )])
+
+        with self.assertRaisesMessage(ValidationError, "Conflito"):
+            hold.confirm_hold()
+        hold.refresh_from_db()
+        self.assertEqual(hold.status, "HELD")
+        self.assertFalse(DailyStat.objects.filter(scheduled_count__gt=0).exists())
+
+
+def reference_slots(day, opening, closing, duration, busy_rows, now, zone):
+    # Oráculo: aritmética direta com datetime em UTC, sem minutos inteiros
+    start = datetime.combine(day, opening, tzinfo=zone).astimezone(dt_timezone.utc)
+    end = datetime.combine(day, closing, tzinfo=zone).astimezone(dt_timezone.utc)
+    length = timedelta(minutes=duration)
+    slots = []
+
+    while start + length <= end:
+        free = all(
+            not (start < busy + timedelta(minutes=minutes) and start + length > busy)
+            for busy, minutes in busy_rows
+        )
+        if free and start >= now:
+            slots.append(start)
+        start += timedelta(minutes=30)
+
+    return slots
+
+
+class SlotGenerationPropertyTests(TestCase):
+    # Dias com transição de horário de verão (e um dia comum de controle)
+    CASES = [
+        ("America/Sao_Paulo", date(2018, 11, 4)),
+        ("America/Sao_Paulo", date(2019, 2, 16)),
+        ("America/Sao_Paulo", date(2019, 2, 17)),
+        ("America/New_York", date(2026, 3, 8)),
+        ("America/New_York", date(2026, 11, 1)),
+        ("America/Sao_Paulo", date(2026, 10, 19)),
+    ]
+
+    def test_matches_reference_across_dst_boundaries(self):
+        rng = random.Random(2026)
+
+        for zone_name, day in self.CASES:
+            zone = ZoneInfo(zone_name)
+            day_start = datetime(day.year, day.month, day.day, tzinfo=zone).astimezone(dt_timezone.utc)
+
+            for _ in range(150):
+                opening_hour = rng.randint(0, 12)
+                opening = time(opening_hour, rng.choice([0, 30]))
+                closing = time(rng.randint(opening_hour + 1, 23), rng.choice([0, 30, 59]))
+                duration = rng.choice([15, 30, 45, 60, 90])
+                busy_rows = [
+                    (day_start + timedelta(minutes=rng.randrange(0, 24 * 60)), rng.choice([15, 30, 60, 120]))
+                    for _ in range(rng.randint(0, 8))
+                ]
+                now = day_start + timedelta(minutes=rng.randrange(-600, 24 * 60), seconds=rng.randrange(60))
+
+                with self.subTest(zone=zone_name, day=day, opening=opening, closing=closing):
+                    slots = compute_slots(day, opening, closing, duration, busy_rows, now, zone)
+                    expected = reference_slots(day, opening, closing, duration, busy_rows, now, zone)
+
+                    self.assertEqual([slot.astimezone(dt_timezone.utc) for slot in slots], expected)
+                    self.assertTrue(all(slot.tzinfo is zone for slot in slots))
+
+    def test_gap_day_starts_at_first_existing_instant(self):
+        zone = ZoneInfo("America/Sao_Paulo")
+        day = date(2018, 11, 4)  # 00:00 pulou direto para 01:00
+        past = datetime(2000, 1, 1, tzinfo=dt_timezone.utc)
+
+        slots = compute_slots(day, time(0, 0), time(2, 0), 30, [], past, zone)
+
+        self.assertEqual(
+            [slot.strftime("%H:%M") for slot in slots],
+            ["01:00", "01:30"],
+        )
+
+
+class CountingHasher(MD5PasswordHasher):
+    algorithm = "counting_md5"
+    calls = 0
+
+    def encode(self, password, salt):
+        CountingHasher.calls += 1
+        return super().encode(password, salt)
+
+
+@override_settings(PASSWORD_HASHERS=["appointments.tests.CountingHasher"])
+class RegistrationTests(TestCase):
+    data = {
+        "first_name": "Ana",
+        "last_name": "Souza",
+        "email": "Ana@Email.com",
+        "phone": "11999999999",
+        "cpf": "52998224725",
+        "password1": "uma-senha-bem-forte-42",
+        "password2": "uma-senha-bem-forte-42",
+    }
+
+    def setUp(self):
+        CountingHasher.calls = 0
+
+    def test_register_hashes_once_and_logs_in(self):
+        response = self.client.post(reverse("appointments:register"), self.data)
+
+        self.assertRedirects(response, reverse("appointments:home"), fetch_redirect_response=False)
+        self.assertEqual(CountingHasher.calls, 1)
+        user = User.objects.get()
+        self.assertEqual(user.patient.cpf, "52998224725")
+        self.assertEqual(int(self.client.session["_auth_user_id"]), user.pk)
+
+    def test_user_is_rolled_back_when_patient_fails(self):
+        with mock.patch.object(Patient.objects, "create", side_effect=IntegrityError):
+            with self.assertRaises(IntegrityError):
+                self.client.post(reverse("appointments:register"), self.data)
+
+        self.assertFalse(User.objects.exists())
+
+
+@override_settings(
+    AUTHENTICATION_BACKENDS=["appointments.backends.CachedModelBackend"],
+    SESSION_ENGINE="django.contrib.sessions.backends.cached_db",
+)
+class CachedProfileTests(ClinicTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.patient.user)
+
+    def test_warm_pages_skip_session_user_and_patient_queries(self):
+        self.client.get(reverse("appointments:catalog"))
+        self.client.get(reverse("appointments:appointment_history"))
+
+        with self.assertNumQueries(1):
+            self.client.get(reverse("appointments:catalog"))
+        with self.assertNumQueries(1):
+            self.client.get(reverse("appointments:appointment_history"))
+
+    def test_patient_and_user_saves_invalidate_cache(self):
+        self.client.get(reverse("appointments:appointment_history"))
+
+        self.patient.phone = "11888888888"
+        self.patient.save()
+        response = self.client.get(reverse("appointments:appointment_history"))
+        self.assertEqual(response.wsgi_request.patient.phone, "11888888888")
+
+        self.patient.user.is_active = False
+        self.patient.user.save()
+        response = self.client.get(reverse("appointments:appointment_history"))
+        self.assertEqual(response.status_code, 302)
+
+    def test_cached_backend_warns_without_shared_cache(self):
+        self.assertEqual([warning.id for warning in check_shared_cache(None)], ["appointments.W001"])
+
+        with override_settings(CACHES={"default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": tempfile.gettempdir(),
+        }}):
+            self.assertEqual(check_shared_cache(None), [])
+
+    @override_settings(AUTHENTICATION_BACKENDS=["django.contrib.auth.backends.ModelBackend"])
+    def test_cached_sessions_warn_without_shared_cache(self):
+        self.assertEqual([warning.id for warning in check_shared_cache(None)], ["appointments.W001"])
+
+        with override_settings(SESSION_ENGINE="django.contrib.sessions.backends.db"):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+@skipUnless(settings.REPLICA_DATABASE in settings.DATABASES, "sem banco réplica configurado")
+@override_settings(DATABASE_ROUTERS=["core.routers.PrimaryReplicaRouter"])
+class ReplicaRouterTests(TestCase):
+    databases = {"default", settings.REPLICA_DATABASE}
+
+    def setUp(self):
+        cache.clear()
+        replica = settings.REPLICA_DATABASE
+        open_every_day()
+        self.patient = make_patient()
+
+        # "Replicação": usuário e paciente existem nos dois bancos, o catálogo difere
+        self.patient.user.save(using=replica)
+        self.patient.save(using=replica)
+        self.procedure = Procedure.objects.create(
+            name="Do primário", description="", price=Decimal("100.00"), duration_minutes=60
+        )
+        Procedure.objects.using(replica).create(
+            pk=self.procedure.pk, name="Da réplica", description="", price=Decimal("100.00"), duration_minutes=60
+        )
+        self.client.force_login(self.patient.user)
+        Session.objects.get(pk=self.client.session.session_key).save(using=replica)
+        self.client.cookies.pop(PIN_COOKIE, None)
+
+    def test_reads_go_to_replica_until_user_writes(self):
+        response = self.client.get(reverse("appointments:catalog"))
+        self.assertContains(response, "Da réplica")
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+        response = self.client.post(reverse("appointments:schedule_appointment"), {
+            "procedure": self.procedure.pk,
+            "date": future_at(9).date().isoformat(),
+            "time": "09:00",
+        })
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.assertTrue(Appointment.objects.using("default").filter(status="HELD").exists())
+
+        response = self.client.get(reverse("appointments:catalog"))
+        self.assertContains(response, "Do primário")
+
+    def test_conflict_check_reads_primary(self):
+        Appointment.objects.create(
+            patient=self.patient, procedure=self.procedure, date_time=future_at(9)
+        )
+        appointment = Appointment(
+            patient=self.patient, procedure=self.procedure, date_time=future_at(9, 30)
+        )
+
+        with request_scope(pinned=False) as state:
+            with self.assertRaisesMessage(ValidationError, "Conflito"):
+                appointment.clean()
+        # Validar não é escrever: a requisição continua lendo da réplica
+        self.assertFalse(state["wrote"])
+
+
+class StaticAssetsTests(TestCase):
+    def test_collectstatic_serves_hashed_precompressed_immutable_assets(self):
+        with tempfile.TemporaryDirectory() as static_root, override_settings(
+            STATIC_ROOT=static_root,
+            STORAGES={
+                **settings.STORAGES,
+                "staticfiles": {"BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage"},
+            },
+        ):
+            call_command("collectstatic", interactive=False, verbosity=0)
+            url = static("vendor/bootstrap/css/bootstrap.min.css")
+            self.assertRegex(url, r"bootstrap\.min\.[0-9a-f]{12}\.css$")
+
+            response = Client().get(url, HTTP_ACCEPT_ENCODING="gzip, br")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response["Content-Encoding"], "br")
+            self.assertIn("immutable", response["Cache-Control"])
+            response.close()
+
+            page = Client().get(reverse("appointments:login"))
+            self.assertContains(page, url)
+            self.assertNotContains(page, "cdn.jsdelivr.net")
+            self.assertNotContains(page, "fonts.googleapis.com")
+            self.assertContains(page, static("vendor/bootstrap/js/bootstrap.bundle.min.js"))
+            self.assertContains(page, static("vendor/poppins/poppins-latin-400.woff2"))
+
+
+class AsyncViewTests(ClinicTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other = make_patient("outro@email.com", cpf="11144477735")
+        self.date_time = future_at(9)
+        Appointment.hold(self.other, self.procedure, self.date_time)
+
+    async def test_read_views_render_on_async_stack(self):
+        for name in ("home", "catalog", "appointment_history"):
+            response = await self.async_client.get(reverse(f"appointments:{name}"))
+            self.assertEqual(response.status_code, 302)
+
+        await self.async_client.aforce_login(self.patient.user)
+        for name in ("home", "appointment_history", "catalog"):
+            response = await self.async_client.get(reverse(f"appointments:{name}"))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(await response.asgi_request.apatient(), self.patient)
+        self.assertContains(response, "Sair")
+
+    async def test_slots_api(self):
+        await self.async_client.aforce_login(self.patient.user)
+        url = reverse("appointments:available_slots")
+
+        response = await self.async_client.get(url, {
+            "procedure": self.procedure.pk,
+            "date": self.date_time.date().isoformat(),
+        })
+        slots = response.json()["slots"]
+        self.assertNotIn("09:00", slots)
+        self.assertNotIn("08:30", slots)
+        self.assertIn("10:00", slots)
+
+        response = await self.async_client.get(url, {"procedure": self.procedure.pk})
+        self.assertEqual(response.status_code, 400)
+
+
+class BestFitSlotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        open_every_day(closing=time(12, 0))
+        self.patient = make_patient()
+        self.short = Procedure.objects.create(
+            name="Avaliação", description="", price=Decimal("100.00"), duration_minutes=30
+        )
+        self.long = Procedure.objects.create(
+            name="Clareamento", description="", price=Decimal("300.00"), duration_minutes=45
+        )
+
+    def test_ranks_slots_by_unusable_leftover(self):
+        # Dia de 0 a 240 min com 60–105 ocupado: os 15 min depois das 105 não servem a ninguém
+        ranked = best_fit_offsets([0, 30, 120, 150, 180, 210], 30, [(60, 105)], 0, 240, [30, 60])
+
+        self.assertEqual([offset for offset, _ in ranked[:2]], [0, 30])
+        self.assertEqual([score[0] for _, score in ranked], [0, 0, 15, 15, 15, 15])
+
+    def test_schedule_marks_recommended_slots(self):
+        Appointment.objects.create(patient=self.patient, procedure=self.long, date_time=future_at(9))
+        self.client.force_login(self.patient.user)
+        data = {"procedure": self.short.pk, "date": future_at(9).date().isoformat()}
+
+        response = self.client.post(reverse("appointments:schedule_appointment"), data)
+        self.assertEqual(response.context["recommended"], {time(8, 0), time(8, 30)})
+        self.assertIn(time(10, 0), response.context["slots"])
+
+        with override_settings(SLOT_POLICY="chronological"):
+            response = self.client.post(reverse("appointments:schedule_appointment"), data)
+        self.assertEqual(response.context["recommended"], set())
+
+    def test_booking_outside_working_hours_does_not_break_ranking(self):
+        # Agendamento que ficou fora do expediente (o horário mudou depois)
+        appointment = Appointment.objects.create(patient=self.patient, procedure=self.short, date_time=future_at(9))
+        Appointment.objects.filter(pk=appointment.pk).update(date_time=future_at(17))
+        self.client.force_login(self.patient.user)
+        day = future_at(9).date().isoformat()
+
+        response = self.client.post(
+            reverse("appointments:schedule_appointment"), {"procedure": self.short.pk, "date": day}
+        )
+        self.assertIn(time(11, 30), response.context["slots"])
+        response = self.client.get(reverse("appointments:available_slots"), {"procedure": self.long.pk, "date": day})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("11:00", response.json()["slots"])
+
+    def test_simulator_replays_history_under_both_policies(self):
+        for days in range(5, 8):
+            for hour, minute, procedure in ((8, 0, self.long), (9, 0, self.long), (10, 0, self.short), (11, 0, self.short)):
+                Appointment.objects.create(
+                    patient=self.patient, procedure=procedure, date_time=future_at(hour, minute, days=days)
+                )
+        start, end = future_at(8, days=5).date(), future_at(8, days=7).date()
+
+        results = simulate(start, end, runs=10)
+        self.assertEqual(results["best_fit"]["days"], 3)
+        self.assertEqual(results["best_fit"]["requests"], 12)
+        self.assertEqual(results["best_fit"]["rejected"], 0)
+        self.assertGreaterEqual(
+            results["best_fit"]["utilization"], results["chronological"]["utilization"]
+        )
+
+        out = StringIO()
+        call_command("simulate_slot_policy", start=start, end=end, stdout=out)
+        self.assertIn("best_fit", out.getvalue())
+
+
+class HoursImpactTests(ClinicTestCase):
+    def setUp(self):
+        super().setUp()
+        self.day = future_at(9).date()
+        self.appointments = {
+            hour: Appointment.objects.create(
+                patient=self.patient, procedure=self.procedure, date_time=future_at(hour, minute)
+            )
+            for hour, minute in ((9, 0), (15, 30), (16, 30))
+        }
+        self.working_day = WorkingDay.objects.get(weekday=self.day.weekday())
+
+    def shorten(self, closing=time(16, 0)):
+        self.working_day.closing_time = closing
+        return self.working_day
+
+    def test_finds_appointments_outside_proposed_hours_in_one_query(self):
+        # Mesmo dia da semana na semana seguinte, mas coberto por um dia especial
+        SpecialDay.objects.create(
+            date=self.day + timedelta(days=7), is_open=True,
+            opening_time=time(8, 0), closing_time=time(18, 0)
+        )
+        Appointment.objects.create(
+            patient=self.patient, procedure=self.procedure, date_time=future_at(17, days=14)
+        )
+
+        with self.assertNumQueries(1):
+            affected = affected_appointments(self.shorten())
+        self.assertEqual(affected, [self.appointments[15], self.appointments[16]])
+
+        closed = SpecialDay(date=self.day, is_open=False)
+        self.assertEqual(len(affected_appointments(closed)), 3)
+
+    def test_admin_requires_confirmation_then_lists_affected(self):
+        staff = User.objects.create_superuser(username="admin", email="admin@email.com", password="x")
+        self.client.force_login(staff)
+        url = reverse("admin:appointments_workingday_change", args=[self.working_day.pk])
+        data = {
+            "weekday": self.working_day.weekday,
+            "opening_time": "08:00",
+            "closing_time": "16:00",
+            "is_open": "on",
+        }
+
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "2 agendamento(s) ficariam fora do horário")
+        self.working_day.refresh_from_db()
+        self.assertEqual(self.working_day.closing_time, time(18, 0))
+
+        response = self.client.post(url, {**data, "confirm_impact": "on"})
+        ids = f"{self.appointments[15].pk},{self.appointments[16].pk}"
+        self.assertRedirects(
+            response, reverse("admin:appointments_appointment_changelist") + f"?id__in={ids}"
+        )
+        self.working_day.refresh_from_db()
+        self.assertEqual(self.working_day.closing_time, time(16, 0))
+
+    def test_bulk_reschedule_and_cancel_keep_rollup(self):
+        WorkingDay.objects.filter(pk=self.working_day.pk).update(closing_time=time(16, 0))
+        late = [self.appointments[15].pk, self.appointments[16].pk]
+
+        moved, unplaced = reschedule_appointments(late)
+        self.assertEqual(unplaced, [])
+        times = sorted(timezone.localtime(appointment.date_time).time() for appointment in moved)
+        self.assertEqual(times, [time(14, 0), time(15, 0)])
+        self.assertEqual(affected_appointments(WorkingDay.objects.get(pk=self.working_day.pk)), [])
+
+        canceled = cancel_appointments(late + [self.appointments[9].pk])
+        self.assertEqual(len(canceled), 3)
+        stat = DailyStat.objects.get(date=self.day, procedure=self.procedure)
+        self.assertEqual((stat.scheduled_count, stat.canceled_count, stat.booked_minutes), (0, 3, 0))
+
+    def test_held_slots_and_validation_follow_the_same_hours_rule(self):
+        # Começa antes do fechamento, mas a consulta de 60 min terminaria às 18:30
+        with self.assertRaisesMessage(ValidationError, "Fora do horário de funcionamento."):
+            Appointment.objects.create(patient=self.patient, procedure=self.procedure, date_time=future_at(17, 30))
+
+        held = Appointment.hold(make_patient("outro@email.com", cpf="11144477735"), self.procedure, future_at(14, 30))
+        affected = affected_appointments(self.shorten(time(15, 0)))
+        self.assertEqual(affected, [held, self.appointments[15], self.appointments[16]])
+
+        self.assertEqual(cancel_appointments([held.pk]), [held])
+        held.refresh_from_db()
+        self.assertEqual(held.status, "CANCELED")
+
+    def test_moving_a_rule_reports_appointments_left_on_the_old_day(self):
+        next_weekday = (self.day.weekday() + 1) % 7
+        WorkingDay.objects.filter(weekday=next_weekday).delete()
+        data = {"weekday": next_weekday, "opening_time": "08:00", "closing_time": "18:00", "is_open": "on"}
+
+        form = WorkingDayForm(data, instance=self.working_day)
+        self.assertFalse(form.is_valid())
+        self.assertEqual(len(form.impact), 3)
+        self.assertEqual(form.previous.weekday, self.day.weekday())
+
+        # Dia especial que sai de uma data volta ao horário do dia da semana
+        WorkingDay.objects.filter(pk=self.working_day.pk).update(closing_time=time(16, 0))
+        special = SpecialDay.objects.create(
+            date=self.day, is_open=True, opening_time=time(8, 0), closing_time=time(18, 0)
+        )
+        form = SpecialDayForm({
+            "date": self.day + timedelta(days=1), "opening_time": "08:00", "closing_time": "18:00", "is_open": "on",
+        }, instance=special)
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.impact, [self.appointments[15], self.appointments[16]])
+
+    def test_admin_delete_previews_and_lists_affected(self):
+        staff = User.objects.create_superuser(username="admin", email="admin@email.com", password="x")
+        self.client.force_login(staff)
+        url = reverse("admin:appointments_workingday_delete", args=[self.working_day.pk])
+
+        response = self.client.get(url)
+        self.assertContains(response, "3 agendamento(s) ficariam fora do horário")
+
+        response = self.client.post(url, {"post": "yes"})
+        ids = ",".join(str(appointment.pk) for appointment in self.appointments.values())
+        self.assertRedirects(
+            response, reverse("admin:appointments_appointment_changelist") + f"?id__in={ids}"
+        )
+        self.assertFalse(WorkingDay.objects.filter(pk=self.working_day.pk).exists())
+        self.assertEqual(DailyCapacity.objects.get(date=self.day).open_minutes, 0)
+
+        # Exclusão em lote pela ação da listagem
+        special = SpecialDay.objects.create(date=self.day + timedelta(days=7), is_open=True,
+                                            opening_time=time(8, 0), closing_time=time(18, 0))
+        late = Appointment.objects.create(
+            patient=self.patient, procedure=self.procedure, date_time=future_at(9, days=14)
+        )
+        response = self.client.post(reverse("admin:appointments_specialday_changelist"), {
+            "action": "delete_selected", "_selected_action": [special.pk], "post": "yes",
+        })
+        self.assertRedirects(
+            response, reverse("admin:appointments_appointment_changelist") + f"?id__in={late.pk}"
+        )
+
+
+@override_settings(RATE_LIMITS={
+    "login": {"ip": "3/m", "user": "2/m"},
+    "slots": {"ip": "100/m", "user": "2/m"},
+})
+class RateLimitTests(ClinicTestCase):
+
+    def login(self, email, ip="10.0.0.1"):
+        return self.client.post(
+            reverse("appointments:login"), {"email": email, "password": "errada"}, REMOTE_ADDR=ip
+        )
+
+    def test_login_buckets_per_ip_and_per_account(self):
+        with mock.patch("appointments.ratelimit.time.time", return_value=1000.0):
+            self.assertEqual(self.login("a@email.com").status_code, 200)
+            self.assertEqual(self.login("b@email.com").status_code, 200)
+            self.assertEqual(self.login("c@email.com").status_code, 200)
+
+            response = self.login("d@email.com")
+            self.assertEqual(response.status_code, 429)
+            self.assertEqual(response["Retry-After"], "20")
+
+            # Mesma conta a partir de outros IPs: cai no balde do usuário
+            self.assertEqual(self.login("alvo@email.com", ip="10.0.0.2").status_code, 200)
+            self.assertEqual(self.login("ALVO@email.com", ip="10.0.0.3").status_code, 200)
+            self.assertEqual(self.login("alvo@email.com", ip="10.0.0.4").status_code, 429)
+
+        with mock.patch("appointments.ratelimit.time.time", return_value=1020.0):
+            self.assertEqual(self.login("d@email.com").status_code, 200)
+
+    async def test_slot_api_is_limited_per_user(self):
+        await self.async_client.aforce_login(self.patient.user)
+        url = reverse("appointments:available_slots")
+        query = {"procedure": self.procedure.pk, "date": future_at(9).date().isoformat()}
+
+        for _ in range(2):
+            self.assertEqual((await self.async_client.get(url, query)).status_code, 200)
+        response = await self.async_client.get(url, query)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "30")
+
+    def test_deploy_check_requires_shared_cache(self):
+        self.assertEqual([warning.id for warning in ratelimit.check_shared_cache(None)], ["appointments.W002"])
+        with override_settings(RATE_LIMITS={}):
+            self.assertEqual(ratelimit.check_shared_cache(None), [])
+
+
+class RequestProfilingTests(ClinicTestCase):
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.staff = User.objects.create_user(username="staff", password="x", is_staff=True)
+
+    def test_header_profiles_staff_requests_only(self):
+        with override_settings(PROFILING_DIR=self.directory.name, PROFILING_SAMPLE_RATE=0):
+            self.client.force_login(self.patient.user)
+            self.client.get(reverse("appointments:catalog"), HTTP_X_PROFILE="1")
+            self.assertEqual(load_profiles(), [])
+
+            self.client.force_login(self.staff)
+            self.client.get(reverse("appointments:catalog"))
+            self.client.get(reverse("appointments:catalog"), HTTP_X_PROFILE="1")
+            profiles = load_profiles()
+            self.assertEqual(len(profiles), 1)
+            self.assertEqual(profiles[0]["view_name"], "appointments:catalog")
+
+            response = self.client.get(reverse("appointments:profile_list"))
+            self.assertContains(response, "appointments:catalog")
+            self.assertTrue(response.context["functions"])
+
+            response = self.client.get(reverse("appointments:profile_download", args=[profiles[0]["id"]]))
+            self.assertEqual(response.status_code, 200)
+            response.close()
+            self.assertEqual(
+                self.client.get(reverse("appointments:profile_download", args=["..%2Fx"])).status_code, 404
+            )
+
+    def test_sample_rate_and_retention(self):
+        self.client.force_login(self.patient.user)
+        # Arquivo que não foi gravado pelo profiling: nem listado nem apagado
+        other = Path(self.directory.name) / "config.json"
+        other.write_text("{}")
+        with override_settings(
+            PROFILING_DIR=self.directory.name, PROFILING_SAMPLE_RATE=1, PROFILING_MAX_FILES=2
+        ):
+            for _ in range(3):
+                self.client.get(reverse("appointments:appointment_history"))
+            self.assertEqual(len(load_profiles()), 2)
+            self.assertTrue(other.exists())
+
+            # Painel é só para staff
+            response = self.client.get(reverse("appointments:profile_list"))
+            self.assertEqual(response.status_code, 302)
+
+
+class TransferTests(ClinicTestCase):
+    procedure_minutes = 30
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        SpecialDay.objects.create(date=timezone.localdate() + timedelta(days=30))
+        self.scheduled = Appointment.objects.create(
+            patient=self.patient, procedure=self.procedure, date_time=future_at(9)
+        )
+        old = Appointment.objects.create(patient=self.patient, procedure=self.procedure, date_time=future_at(10))
+        Appointment.objects.filter(pk=old.pk).update(date_time=old.date_time - timedelta(days=1000), status="DONE")
+        archive_appointments(archive_cutoff(730))
+        Appointment.objects.create(
+            patient=self.patient, procedure=self.procedure, date_time=future_at(11),
+            status="HELD", hold_expires_at=timezone.now() + timedelta(minutes=5),
+        )
+
+    def test_round_trip_keeps_rows_and_checksums(self):
+        staff = User.objects.create_user(username="staff", password="x", is_staff=True)
+        group = Group.objects.create(name="Recepção")
+        group.permissions.add(Permission.objects.get(codename="change_appointment"))
+        staff.groups.add(group)
+        staff.user_permissions.add(Permission.objects.get(codename="view_dailystat"))
+        LogEntry.objects.log_actions(staff.pk, [self.procedure], ADDITION)
+
+        first = export_clinic(self.directory.name, chunk_size=1)
+        rows = {entry["model"]: entry["rows"] for entry in first["models"]}
+        self.assertEqual(rows["appointments.appointment"], 1)  # reserva temporária fica de fora
+        self.assertEqual(verify_export(self.directory.name), rows)
+
+        with self.assertRaises(ValueError):
+            import_clinic(self.directory.name)
+
+        stats = list(DailyStat.objects.order_by("pk").values_list("date", "scheduled_count", "done_count", "booked_minutes"))
+        import_clinic(self.directory.name, chunk_size=1, replace=True)
+
+        restored = Appointment.objects.get()
+        self.assertEqual(restored.pk, self.scheduled.pk)
+        self.assertEqual(restored.created_at, self.scheduled.created_at)
+        self.assertEqual(ArchivedAppointment.objects.count(), 1)
+        self.assertEqual(list(DailyStat.objects.order_by("pk").values_list("date", "scheduled_count", "done_count", "booked_minutes")), stats)
+        # Grupos, permissões e histórico do admin continuam com a equipe
+        staff = User.objects.get(username="staff")
+        self.assertTrue(staff.has_perm("appointments.change_appointment"))
+        self.assertTrue(staff.has_perm("appointments.view_dailystat"))
+        self.assertEqual(LogEntry.objects.get().user, staff)
+
+        with tempfile.TemporaryDirectory() as again:
+            second = export_clinic(again)
+        self.assertEqual(
+            [entry["sha256"] for entry in first["models"]],
+            [entry["sha256"] for entry in second["models"]],
+        )
+        # Chaves novas continuam depois das restauradas
+        extra = Procedure.objects.create(
+            name="Clareamento", description="", price=Decimal("300.00"), duration_minutes=60
+        )
+        self.assertGreater(extra.pk, self.procedure.pk)
+
+    def test_import_rejects_tampered_files(self):
+        call_command("export_clinic", self.directory.name, stdout=StringIO())
+        manifest_path = f"{self.directory.name}/manifest.json"
+        with open(manifest_path) as source:
+            manifest = source.read()
+        with open(manifest_path, "w") as output:
+            output.write(manifest.replace('"rows": 1,', '"rows": 2,', 1))
+
+        with self.assertRaises(CommandError):
+            call_command("import_clinic", self.directory.name, "--check", stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command("import_clinic", self.directory.name, "--replace", stdout=StringIO())
+        self.assertEqual(Appointment.objects.count(), 2)
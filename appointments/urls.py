@@ -10,7 +10,13 @@ urlpatterns = [
     path("login/", views.login_view, name="login"),
     path("logout/", views.logout_view, name="logout"),
     path('schedule/', views.schedule_appointment, name='schedule_appointment'),
+    path('schedule/slots/', views.available_slots, name='available_slots'),
+    path('schedule/confirm/<int:appointment_id>/', views.confirm_appointment, name='confirm_appointment'),
     path('cancel/<int:appointment_id>/', views.cancel_appointment, name='cancel_appointment'),
     path("catalog/", views.catalog, name="catalog"),
     path("history/", views.appointment_history, name="appointment_history"),
+    path("reports/", views.report_dashboard, name="report_dashboard"),
+    path("reports/export/", views.report_export, name="report_export"),
+    path("reports/profiles/", views.profile_list, name="profile_list"),
+    path("reports/profiles/<str:profile_id>/", views.profile_download, name="profile_download"),
 ]
\ No newline at end of file
@@ -1,3 +1,5 @@
 from .auth import *
 from .appointment import *
-from .catalog import *
\ No newline at end of file
+from .catalog import *
+from .reports import *
+from .profiling import *
\ No newline at end of file
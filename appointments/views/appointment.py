@@ -1,79 +1,32 @@
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.core.exceptions import ValidationError
+from django.http import JsonResponse
 from django.utils import timezone
-from datetime import datetime, timedelta
+from datetime import datetime
 from ..forms import AppointmentForm
-from ..models import Appointment, WorkingDay, SpecialDay
+from ..models import Appointment, Procedure
+from ..ratelimit import rate_limit
+from ..services.availability import aoffer_slots, offer_slots
+from ..services.dashboard import apatient_summary, upcoming_appointments
+from ..shortcuts import arender
 
 @login_required
-def home(request):
-    patient_profile = request.user.patient
-    appointments = Appointment.objects.filter(patient=patient_profile).order_by('date_time')
+async def home(request):
+    patient_profile = await request.apatient()
 
-    return render(request, 'appointments/home.html',{
-        'appointments': appointments
+    return await arender(request, 'appointments/home.html',{
+        'appointments': [appointment async for appointment in upcoming_appointments(patient_profile)],
+        'summary': await apatient_summary(patient_profile),
     })
 
-def generate_available_slots(date, procedure):
-    slots = []
-
-    # verifica se tem dia especial
-    special = SpecialDay.objects.filter(date=date).first()
-
-    if special:
-        if not special.is_open:
-            return []  # Clínica fechada nesse dia
-        opening = special.opening_time
-        closing = special.closing_time
-    else:
-        weekday = date.weekday()
-        working_day = WorkingDay.objects.filter(
-            weekday=weekday,
-            is_open=True
-        ).first()
-
-        if not working_day:
-            return []  # Clínica fechada nesse dia
-        
-        opening = working_day.opening_time
-        closing = working_day.closing_time
-
-    current = timezone.make_aware(datetime.combine(date, opening))
-    end = timezone.make_aware(datetime.combine(date, closing))
-
-    duration = timedelta(minutes=procedure.duration_minutes)
-
-    # Buscar todos agendamentos do dia uma vez
-    appointments = Appointment.objects.filter(
-        date_time__date = date,
-        status="SCHEDULED"
-    ).select_related("procedure")
-
-    while current + duration <= end:
-        has_conflict = False
-
-        for existing in appointments:
-            existing_start = existing.date_time
-            existing_end = existing_start + timedelta(
-                minutes=existing.procedure.duration_minutes
-            )
-
-            if current < existing_end and (current + duration) > existing_start:
-                has_conflict = True
-                break
-
-        if not has_conflict and current >= timezone.now():
-            slots.append(current.time())
-
-        current += timedelta(minutes=30)
-
-    return slots
-
 @login_required
+@rate_limit("slots")
 def schedule_appointment(request):
     slots = None
+    recommended = set()
+    hold = None
 
     if request.method == "POST":
         form = AppointmentForm(request.POST)
@@ -83,41 +36,82 @@ def schedule_appointment(request):
             date = form.cleaned_data["date"]
             time = form.cleaned_data["time"]
 
-            # Já escolheu o horário
+            # Já escolheu o horário: reserva até o paciente confirmar
             if time:
                 date_time = datetime.combine(date, time)
                 date_time = timezone.make_aware(date_time)
 
-                appointment = Appointment(
-                    patient = request.user.patient,
-                    procedure = procedure,
-                    date_time = date_time
-                )
-
                 try:
-                    appointment.save()
-                    messages.success(request, "Consulta agendada com sucesso!")
-                    return redirect('appointments:home')
+                    hold = Appointment.hold(
+                        patient = request.patient,
+                        procedure = procedure,
+                        date_time = date_time
+                    )
                 except ValidationError as e:
                     for error in e.messages:
                         form.add_error(None, error)
             
             # Gerar horário
             else:
-                slots = generate_available_slots(date, procedure)
+                slots, recommended = offer_slots(date, procedure, request.patient)
 
     else:
         form = AppointmentForm()
 
     return render(request, 'appointments/schedule.html', {
             'form': form,
-            'slots': slots
+            'slots': slots,
+            'recommended': recommended,
+            'hold': hold
         })
 
+@login_required
+@rate_limit("slots", methods=("GET",))
+async def available_slots(request):
+    # Só leitura: horários livres em JSON, sem passar pelo formulário
+    try:
+        procedure_id = int(request.GET["procedure"])
+        date = datetime.strptime(request.GET["date"], "%Y-%m-%d").date()
+    except (KeyError, ValueError):
+        return JsonResponse(
+            {"error": "Informe o procedimento e a data (AAAA-MM-DD)."},
+            status=400
+        )
+
+    procedure = await aget_object_or_404(Procedure, pk=procedure_id)
+    slots, recommended = await aoffer_slots(date, procedure, await request.apatient())
+
+    return JsonResponse({
+        "date": date.isoformat(),
+        "procedure": procedure.pk,
+        "slots": [slot.strftime("%H:%M") for slot in slots],
+        "recommended": [slot.strftime("%H:%M") for slot in slots if slot in recommended]
+    })
+
+@login_required
+def confirm_appointment(request, appointment_id):
+    appointment = get_object_or_404(
+        Appointment,
+        id=appointment_id,
+        patient=request.patient,
+        status="HELD"
+    )
+
+    if request.method == "POST":
+        try:
+            appointment.confirm_hold()
+            messages.success(request, "Consulta agendada com sucesso!")
+            return redirect('appointments:home')
+        except ValidationError as e:
+            for error in e.messages:
+                messages.error(request, error)
+
+    return redirect('appointments:schedule_appointment')
+
 @login_required
 def cancel_appointment(request, appointment_id):
     # Garante que só o paciente cancele os próprios agendamentos
-    appointment = get_object_or_404(Appointment, id=appointment_id, patient__user=request.user)
+    appointment = get_object_or_404(Appointment, id=appointment_id, patient=request.patient)
 
     if request.method == 'POST':
         try:
@@ -127,15 +121,11 @@ def cancel_appointment(request, appointment_id):
             for error in e.messages:
                 messages.error(request, error)
 
-    return redirect('home')
+    return redirect('appointments:home')
 
 @login_required
-def appointment_history(request):
-    patient = request.user.patient
-    appointments = Appointment.objects.filter(
-        patient=patient,
-        status__in=["DONE", "NO_SHOW"]
-    ).order_by("-date_time")
+async def appointment_history(request):
+    patient = await request.apatient()
 
     start_date = request.GET.get("start_date")
     end_date = request.GET.get("end_date")
@@ -143,19 +133,24 @@ def appointment_history(request):
     if start_date:
         try:
             start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
-            appointments = appointments.filter(date_time__date__gte=start_date)
         except ValueError:
             start_date = None
 
     if end_date:
         try:
             end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
-            appointments = appointments.filter(date_time__date__lte=end_date)
         except ValueError:
             end_date = None
-    
-    return render(request, "appointment/history.html", {
-        "appointments": appointments,
+
+    # Lê tanto os agendamentos recentes quanto os arquivados
+    appointments = patient.appointment_history(
+        start_date=start_date,
+        end_date=end_date,
+        ordering="-date_time"
+    )
+
+    return await arender(request, "appointments/history.html", {
+        "appointments": [row async for row in appointments],
         "start_date": start_date,
         "end_date": end_date
     })
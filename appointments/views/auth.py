@@ -1,29 +1,26 @@
 from django.shortcuts import render, redirect
-from django.contrib.auth import login, logout, authenticate
+from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
 from ..forms.patient import PatientRegistrationForm
 from ..forms.auth import EmailAuthenticationForm
 from ..models import Patient
+from ..ratelimit import rate_limit
 
 def register(request):
     if request.method == 'POST':
         form = PatientRegistrationForm(request.POST)
         if form.is_valid():
             user = form.save()
-            user = authenticate(
-                request,
-                username=user.email,
-                password=form.cleaned_data["password1"]
-            )
 
-            if user is not None:
-                login(request, user)
-                return redirect("appointments:home")
+            # Acabou de ser criado: login direto, sem autenticar (e gerar o hash) de novo
+            login(request, user)
+            return redirect("appointments:home")
     else:
         form = PatientRegistrationForm()
 
     return render(request, 'registration/register.html', {'form': form})
 
+@rate_limit("login", account_field="email")
 def login_view(request):
     if request.method == "POST":
         form = EmailAuthenticationForm(request.POST)
@@ -1,12 +1,12 @@
-from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 
 from ..models import Procedure
+from ..shortcuts import arender
 
 
 @login_required
-def catalog(request):
-    procedures = Procedure.objects.all()
-    return render(request, "appointments/catalog.html", {
+async def catalog(request):
+    procedures = [procedure async for procedure in Procedure.objects.all()]
+    return await arender(request, "appointments/catalog.html", {
         "procedures": procedures
     })
\ No newline at end of file
@@ -0,0 +1,38 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import FileResponse, Http404
+from django.shortcuts import render
+from core.profiling import hot_functions, load_profiles, profile_path
+
+# Quantas das requisições mais lentas são listadas (e somadas nas funções)
+SLOWEST_LIMIT = 50
+
+
+@staff_member_required
+def profile_list(request):
+    profiles = load_profiles()
+    view_names = sorted({meta["view_name"] for meta in profiles if meta.get("view_name")})
+
+    view_name = request.GET.get("view")
+    if view_name:
+        profiles = [meta for meta in profiles if meta.get("view_name") == view_name]
+    profiles = profiles[:SLOWEST_LIMIT]
+
+    # Um perfil escolhido na lista, ou a soma dos mais lentos
+    selected = request.GET.get("profile")
+    ids = [selected] if selected else [meta["id"] for meta in profiles]
+
+    return render(request, "appointments/reports/profiles.html", {
+        "profiles": profiles,
+        "functions": hot_functions(ids),
+        "view_names": view_names,
+        "view_name": view_name,
+        "selected": selected,
+    })
+
+
+@staff_member_required
+def profile_download(request, profile_id):
+    path = profile_path(profile_id)
+    if path is None:
+        raise Http404("Perfil não encontrado.")
+    return FileResponse(path.open("rb"), as_attachment=True, filename=path.name)
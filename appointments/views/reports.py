@@ -0,0 +1,59 @@
+import csv
+from datetime import datetime, timedelta
+from django.shortcuts import render
+from django.http import StreamingHttpResponse
+from django.contrib.admin.views.decorators import staff_member_required
+from django.utils import timezone
+from ..services.reports import export_rows, revenue_by_procedure, weekly_summary
+
+
+class Echo:
+    """Objeto com ``write`` que só devolve o valor, para o csv.writer em streaming."""
+
+    def write(self, value):
+        return value
+
+
+def _parse_range(request, default_days):
+    today = timezone.localdate()
+    start_date = request.GET.get("start_date")
+    end_date = request.GET.get("end_date")
+
+    try:
+        start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        start_date = today - timedelta(days=default_days)
+
+    try:
+        end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        end_date = today
+
+    return start_date, end_date
+
+
+@staff_member_required
+def report_dashboard(request):
+    start_date, end_date = _parse_range(request, default_days=12 * 7)
+
+    return render(request, "appointments/reports/dashboard.html", {
+        "weeks": weekly_summary(start_date, end_date),
+        "procedures": revenue_by_procedure(start_date, end_date),
+        "start_date": start_date,
+        "end_date": end_date,
+    })
+
+
+@staff_member_required
+def report_export(request):
+    start_date, end_date = _parse_range(request, default_days=30)
+    writer = csv.writer(Echo())
+
+    response = StreamingHttpResponse(
+        (writer.writerow(row) for row in export_rows(start_date, end_date)),
+        content_type="text/csv",
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="relatorio_{start_date}_{end_date}.csv"'
+    )
+    return response
@@ -0,0 +1,35 @@
+"""Configuração comum dos benchmarks (rodar da raiz: ``python -m benchmarks.<nome>``)."""
+import os
+from contextlib import contextmanager
+
+import django
+
+
+def setup(sqlite=False):
+    """Inicializa o Django; ``sqlite=True`` troca o banco por um SQLite em memória."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+
+    if sqlite:
+        from django.conf import settings
+
+        settings.DATABASES = {
+            "default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"},
+        }
+
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    """Cria (e remove no fim) um banco de teste, como o ``manage.py test`` faz."""
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
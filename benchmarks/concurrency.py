@@ -0,0 +1,164 @@
+"""Vazão com conexões concorrentes: WSGI, ASGI com views síncronas e ASGI com views assíncronas.
+
+Sobe cada servidor (gunicorn com threads, uvicorn) num subprocesso, com um
+único processo de aplicação, sobre um SQLite temporário com dados de exemplo,
+e dispara requisições autenticadas (home, catálogo, histórico e horários
+livres) com N conexões keep-alive simultâneas. O cliente é assíncrono, para
+não ser ele o gargalo. Precisa de ``gunicorn`` e ``uvicorn`` instalados.
+
+    python -m benchmarks.concurrency [--concurrency 1 10 50] [--seconds 5]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+SERVERS = (
+    ("WSGI (gunicorn gthread)", "wsgi", "benchmarks.sync_urls"),
+    ("ASGI + views síncronas", "asgi", "benchmarks.sync_urls"),
+    ("ASGI + views assíncronas", "asgi", "core.urls"),
+)
+
+
+def prepare(database):
+    """Cria o banco, os dados e uma sessão logada; devolve (cookie, caminhos)."""
+    os.environ["DJANGO_SETTINGS_MODULE"] = "benchmarks.settings"
+    os.environ["BENCHMARK_DATABASE"] = database
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+
+    import django
+
+    django.setup()
+
+    from django.conf import settings
+    from django.core.management import call_command
+    from django.test import Client
+    from django.urls import reverse
+    from django.utils import timezone
+    from appointments.models import Procedure
+    from .profiles import seed
+
+    call_command("migrate", verbosity=0)
+    user = seed()
+
+    client = Client()
+    client.force_login(user)
+    cookie = f"{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}"
+
+    day = timezone.localdate() + timedelta(days=3)
+    paths = [
+        reverse("appointments:home"),
+        reverse("appointments:catalog"),
+        reverse("appointments:appointment_history"),
+        f"{reverse('appointments:available_slots')}?procedure={Procedure.objects.first().pk}&date={day}",
+    ]
+    return cookie, paths
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(kind, urlconf, port, threads):
+    if kind == "wsgi":
+        command = [
+            sys.executable, "-m", "gunicorn", "core.wsgi:application",
+            "--worker-class", "gthread", "--workers", "1", "--threads", str(threads),
+            "--bind", f"127.0.0.1:{port}", "--log-level", "warning",
+        ]
+    else:
+        command = [
+            sys.executable, "-m", "uvicorn", "core.asgi:application",
+            "--workers", "1", "--host", "127.0.0.1", "--port", str(port),
+            "--log-level", "warning", "--no-access-log",
+        ]
+
+    server = subprocess.Popen(command, env={**os.environ, "BENCHMARK_URLCONF": urlconf})
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError(f"servidor {kind} não subiu na porta {port}")
+
+
+async def fetch(reader, writer, path, cookie):
+    writer.write(
+        f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nCookie: {cookie}\r\n\r\n".encode()
+    )
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def connection(port, paths, cookie, deadline, latencies):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    index = 0
+    try:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            status = await fetch(reader, writer, paths[index % len(paths)], cookie)
+            assert status == 200, status
+            latencies.append(time.perf_counter() - started)
+            index += 1
+    finally:
+        writer.close()
+
+
+async def load(port, paths, cookie, concurrency, seconds):
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    await asyncio.gather(*(
+        connection(port, paths, cookie, deadline, latencies) for _ in range(concurrency)
+    ))
+    latencies.sort()
+    return len(latencies) / seconds, latencies[int(len(latencies) * 0.95)] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        cookie, paths = prepare(os.path.join(directory, "benchmark.sqlite3"))
+
+        print(f"{'servidor':<28}{'conexões':>9}{'req/s':>10}{'p95':>11}")
+        for label, kind, urlconf in SERVERS:
+            port = free_port()
+            server = start_server(kind, urlconf, port, threads=max(args.concurrency))
+            try:
+                # Aquece caches de template, sessão e perfil
+                asyncio.run(load(port, paths, cookie, 1, 1))
+                for concurrency in args.concurrency:
+                    throughput, p95 = asyncio.run(load(port, paths, cookie, concurrency, args.seconds))
+                    print(f"{label:<28}{concurrency:>9}{throughput:>10.1f}{p95:>9.1f}ms")
+            finally:
+                server.terminate()
+                server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Latência de cada página em cada perfil de configuração (dev, test, prod).
+
+Cada perfil roda num subprocesso com ``DJANGO_PROFILE`` próprio, sobre um
+banco de teste com alguns dados. ``--sqlite`` usa SQLite em memória em vez do
+banco configurado (útil sem PostgreSQL local).
+
+    python -m benchmarks.profiles [--requests 50] [--sqlite]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time as clock
+
+PROFILES = ("dev", "test", "prod")
+
+
+def seed():
+    from datetime import datetime, time, timedelta
+    from decimal import Decimal
+    from django.contrib.auth.models import User
+    from django.utils import timezone
+    from appointments.models import Appointment, Patient, Procedure, WorkingDay
+
+    for weekday in range(7):
+        WorkingDay.objects.create(weekday=weekday, opening_time=time(8), closing_time=time(18))
+    procedures = [
+        Procedure.objects.create(
+            name=f"Procedimento {index}", description="Descrição " * 20,
+            price=Decimal("150.00"), duration_minutes=30,
+        )
+        for index in range(12)
+    ]
+    user = User.objects.create_user(username="bench@email.com", email="bench@email.com", password="x")
+    patient = Patient.objects.create(user=user, phone="11999999999", cpf="52998224725")
+
+    day = timezone.localdate() + timedelta(days=3)
+    for hour in range(8, 18):
+        Appointment.objects.create(
+            patient=patient,
+            procedure=procedures[hour % len(procedures)],
+            date_time=timezone.make_aware(datetime.combine(day, time(hour))),
+        )
+    return user
+
+
+def worker(requests):
+    from django.conf import settings
+    from django.core.management import call_command
+    from django.test import Client
+    from django.urls import reverse
+
+    user = seed()
+    if not settings.DEBUG:
+        # Em produção os estáticos passam pelo collectstatic (manifest com hash)
+        settings.STATIC_ROOT = tempfile.mkdtemp()
+        call_command("collectstatic", interactive=False, verbosity=0)
+
+    anonymous = Client()
+    client = Client()
+    client.force_login(user)
+    pages = {
+        "login": (anonymous, reverse("appointments:login")),
+        "home": (client, reverse("appointments:home")),
+        "catalog": (client, reverse("appointments:catalog")),
+        "schedule": (client, reverse("appointments:schedule_appointment")),
+        "history": (client, reverse("appointments:appointment_history")),
+    }
+
+    results = {}
+    for name, (page_client, url) in pages.items():
+        for _ in range(3):
+            page_client.get(url)
+        started = clock.perf_counter()
+        for _ in range(requests):
+            response = page_client.get(url)
+            assert response.status_code == 200, (name, response.status_code)
+        results[name] = (clock.perf_counter() - started) / requests * 1000
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--sqlite", action="store_true")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        from ._django import setup, test_database
+
+        setup(sqlite=args.sqlite)
+        with test_database():
+            print(json.dumps(worker(args.requests)))
+        return
+
+    table = {}
+    for profile in PROFILES:
+        command = [sys.executable, "-m", "benchmarks.profiles", "--worker", "--requests", str(args.requests)]
+        if args.sqlite:
+            command.append("--sqlite")
+        output = subprocess.run(
+            command,
+            env={**os.environ, "DJANGO_PROFILE": profile},
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        table[profile] = json.loads(output.strip().splitlines()[-1])
+
+    pages = list(table[PROFILES[0]])
+    print(f"{'página':<10}" + "".join(f"{profile:>12}" for profile in PROFILES) + f"{'prod/dev':>10}")
+    for page in pages:
+        row = "".join(f"{table[profile][page]:>10.2f}ms" for profile in PROFILES)
+        print(f"{page:<10}{row}{table['prod'][page] / table['dev'][page]:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Custo do limitador de requisições por requisição, com o cache local (locmem).
+
+Compara uma view trivial com e sem ``rate_limit`` (dois baldes: IP e conta),
+chamada direto com ``RequestFactory``, sem banco. O limite é alto para que
+todas as chamadas passem, como no caso comum.
+
+    python -m benchmarks.ratelimit [chamadas]
+"""
+import sys
+import time
+from urllib.parse import urlencode
+
+from ._django import setup
+
+setup()
+
+from django.contrib.auth.models import AnonymousUser  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.http import HttpResponse  # noqa: E402
+from django.test import RequestFactory, override_settings  # noqa: E402
+from appointments.ratelimit import rate_limit  # noqa: E402
+
+
+def view(request):
+    # Como o login, a view lê o formulário de qualquer jeito
+    return HttpResponse(request.POST.get("email"))
+
+
+limited = rate_limit("bench", account_field="email")(view)
+
+
+def run(handler, count):
+    factory = RequestFactory()
+    requests = []
+    for index in range(count):
+        request = factory.post(
+            "/",
+            urlencode({"email": f"user{index % 100}@email.com"}),
+            content_type="application/x-www-form-urlencoded",
+            REMOTE_ADDR=f"10.0.{index % 50}.1",
+        )
+        request.user = AnonymousUser()
+        requests.append(request)
+
+    started = time.perf_counter()
+    for request in requests:
+        handler(request)
+    return (time.perf_counter() - started) / count * 1_000_000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    with override_settings(
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+        RATE_LIMITS={"bench": {"ip": "1000000/s", "user": "1000000/s"}},
+    ):
+        cache.clear()
+        # Melhor de três rodadas, para tirar ruído
+        bare = min(run(view, count) for _ in range(3))
+        with_limit = min(run(limited, count) for _ in range(3))
+
+    print(f"sem limitador: {bare:7.2f} µs/requisição")
+    print(f"com limitador: {with_limit:7.2f} µs/requisição (+{with_limit - bare:.2f} µs)")
+
+
+if __name__ == "__main__":
+    main()
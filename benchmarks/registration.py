@@ -0,0 +1,71 @@
+"""Cadastros por segundo em um único worker.
+
+Mede o cadastro completo (POST em ``register`` com o hasher de senha configurado)
+e, para comparação, o custo extra do fluxo anterior, que chamava
+``authenticate()`` depois de salvar (um segundo hash da mesma senha).
+
+    python -m benchmarks.registration [quantidade]
+"""
+import sys
+import time
+
+from ._django import setup, test_database
+
+setup()
+
+from django.contrib.auth import authenticate  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+PASSWORD = "uma-senha-bem-forte-42"
+
+
+def make_cpf(number):
+    digits = [int(d) for d in f"{number:09d}"]
+    for weight in (10, 11):
+        total = sum(d * (weight - i) for i, d in enumerate(digits))
+        digit = (total * 10) % 11
+        digits.append(0 if digit == 10 else digit)
+    return "".join(map(str, digits))
+
+
+def payload(index):
+    return {
+        "first_name": "Paciente",
+        "last_name": str(index),
+        "email": f"paciente{index}@email.com",
+        "phone": "11999999999",
+        "cpf": make_cpf(100000000 + index),
+        "password1": PASSWORD,
+        "password2": PASSWORD,
+    }
+
+
+def run(count, offset, extra_authenticate=False):
+    client = Client()
+    url = reverse("appointments:register")
+
+    started = time.perf_counter()
+    for index in range(offset, offset + count):
+        data = payload(index)
+        response = client.post(url, data)
+        assert response.status_code == 302, response.status_code
+        if extra_authenticate:
+            authenticate(username=data["email"], password=PASSWORD)
+        client.logout()
+    return count / (time.perf_counter() - started)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+    with test_database():
+        current = run(count, 0)
+        previous = run(count, count, extra_authenticate=True)
+
+    print(f"cadastro atual (1 hash):           {current:6.2f} cadastros/s por worker")
+    print(f"com authenticate extra (anterior): {previous:6.2f} cadastros/s por worker")
+
+
+if __name__ == "__main__":
+    main()
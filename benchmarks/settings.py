@@ -0,0 +1,24 @@
+"""Configuração dos servidores do ``benchmarks.concurrency``: SQLite em arquivo, sem DEBUG."""
+import os
+
+from core.settings import *  # noqa: F401,F403
+from core.settings import ROOT_URLCONF, STORAGES
+
+DEBUG = False
+ALLOWED_HOSTS = ["127.0.0.1", "localhost"]
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.environ["BENCHMARK_DATABASE"],
+    },
+}
+DATABASE_ROUTERS = []
+
+# benchmarks.sync_urls troca as views de leitura pelas versões síncronas
+ROOT_URLCONF = os.getenv("BENCHMARK_URLCONF", ROOT_URLCONF)
+
+STORAGES = {
+    **STORAGES,
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
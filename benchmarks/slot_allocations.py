@@ -0,0 +1,84 @@
+"""Alocações e tempo por chamada da geração de horários livres.
+
+Compara o núcleo em minutos inteiros (``compute_slots``) com o algoritmo
+anterior, que montava ``datetime`` com fuso e somava ``timedelta`` a cada passo.
+
+    python -m benchmarks.slot_allocations
+"""
+import timeit
+import tracemalloc
+from datetime import date, datetime, time, timedelta
+
+from ._django import setup
+
+setup()
+
+from django.utils import timezone  # noqa: E402
+from appointments.services.availability import clinic_zone, compute_slots  # noqa: E402
+
+DAY = date(2030, 6, 10)
+OPENING = time(8, 0)
+CLOSING = time(18, 0)
+DURATION = 30
+CALLS = 2000
+
+
+def busy_rows():
+    rows = []
+    for hour in (8, 9, 10, 11, 13, 14, 15, 16, 17):
+        start = timezone.make_aware(datetime.combine(DAY, time(hour, 0)))
+        rows.append((start, 45))
+    return rows
+
+
+def legacy_slots(day, opening, closing, duration, rows, now):
+    # Versão anterior de generate_available_slots, sem o acesso ao banco
+    slots = []
+    current = timezone.make_aware(datetime.combine(day, opening))
+    end = timezone.make_aware(datetime.combine(day, closing))
+    length = timedelta(minutes=duration)
+
+    while current + length <= end:
+        has_conflict = False
+        for existing_start, minutes in rows:
+            existing_end = existing_start + timedelta(minutes=minutes)
+            if current < existing_end and (current + length) > existing_start:
+                has_conflict = True
+                break
+        if not has_conflict and current >= now:
+            slots.append(current.time())
+        current += timedelta(minutes=30)
+
+    return slots
+
+
+def measure(name, func):
+    func()  # aquece caches (ZoneInfo, imports)
+
+    tracemalloc.start()
+    peaks = 0
+    for _ in range(CALLS):
+        tracemalloc.reset_peak()
+        start, _ = tracemalloc.get_traced_memory()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        peaks += peak - start
+    tracemalloc.stop()
+
+    seconds = timeit.timeit(func, number=CALLS) / CALLS
+    print(f"{name:<10} {seconds * 1e6:8.1f} µs/chamada   {peaks / CALLS:8.0f} B alocados no pico/chamada")
+
+
+def main():
+    rows = busy_rows()
+    zone = clinic_zone()
+    now = timezone.make_aware(datetime.combine(DAY, time(0, 0)))
+
+    measure("anterior", lambda: legacy_slots(DAY, OPENING, CLOSING, DURATION, rows, now))
+    measure("minutos", lambda: [
+        slot.time() for slot in compute_slots(DAY, OPENING, CLOSING, DURATION, rows, now, zone)
+    ])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""URLs do app com as views de leitura na versão síncrona, para comparação."""
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404, render
+from django.urls import include, path
+from datetime import datetime
+
+from appointments import urls as app_urls
+from appointments.models import Procedure
+from appointments.services.availability import offer_slots
+from appointments.services.dashboard import patient_summary, upcoming_appointments
+
+
+@login_required
+def home(request):
+    return render(request, "appointments/home.html", {
+        "appointments": upcoming_appointments(request.patient),
+        "summary": patient_summary(request.patient),
+    })
+
+
+@login_required
+def catalog(request):
+    return render(request, "appointments/catalog.html", {
+        "procedures": Procedure.objects.all(),
+    })
+
+
+@login_required
+def appointment_history(request):
+    return render(request, "appointments/history.html", {
+        "appointments": request.patient.appointment_history(ordering="-date_time"),
+    })
+
+
+@login_required
+def available_slots(request):
+    procedure = get_object_or_404(Procedure, pk=int(request.GET["procedure"]))
+    date = datetime.strptime(request.GET["date"], "%Y-%m-%d").date()
+    slots, recommended = offer_slots(date, procedure, request.patient)
+    return JsonResponse({
+        "date": date.isoformat(),
+        "procedure": procedure.pk,
+        "slots": [slot.strftime("%H:%M") for slot in slots],
+        "recommended": [slot.strftime("%H:%M") for slot in slots if slot in recommended],
+    })
+
+
+SYNC_VIEWS = {
+    "home": home,
+    "catalog": catalog,
+    "appointment_history": appointment_history,
+    "available_slots": available_slots,
+}
+
+patterns = [
+    path(str(pattern.pattern), SYNC_VIEWS[pattern.name], name=pattern.name)
+    if pattern.name in SYNC_VIEWS else pattern
+    for pattern in app_urls.urlpatterns
+]
+
+urlpatterns = [
+    path("", include((patterns, app_urls.app_name))),
+]
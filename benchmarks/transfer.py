@@ -0,0 +1,82 @@
+"""Exportação/restauração da clínica: ``dumpdata``/``loaddata`` contra ``export_clinic``/``import_clinic``.
+
+Gera ``N`` agendamentos num SQLite em memória e mede tempo e pico de memória
+Python (``tracemalloc``) de cada ida e volta. O ``tracemalloc`` deixa tudo
+mais lento por igual; o que importa é a comparação.
+
+    python -m benchmarks.transfer [agendamentos]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import timedelta
+from decimal import Decimal
+
+from ._django import setup, test_database
+
+setup(sqlite=True)
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from appointments.models import Appointment, Patient, Procedure  # noqa: E402
+from appointments.services.transfer import export_clinic, import_clinic  # noqa: E402
+
+
+def populate(count):
+    procedures = Procedure.objects.bulk_create([
+        Procedure(name=f"Procedimento {minutes}", description="", price=Decimal("100.00"), duration_minutes=minutes)
+        for minutes in (30, 60, 90)
+    ])
+    users = User.objects.bulk_create([User(username=f"user{index}") for index in range(200)])
+    patients = Patient.objects.bulk_create([
+        Patient(user=user, phone="11999999999", cpf=f"{index:011d}") for index, user in enumerate(users)
+    ])
+    start = timezone.now() - timedelta(days=365)
+    Appointment.objects.bulk_create([
+        Appointment(
+            patient=patients[index % len(patients)],
+            procedure=procedures[index % len(procedures)],
+            date_time=start + timedelta(minutes=30 * index),
+            status="DONE" if index % 3 else "SCHEDULED",
+        )
+        for index in range(count)
+    ], batch_size=2000)
+
+
+def measure(action):
+    tracemalloc.start()
+    started = time.perf_counter()
+    action()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+
+    with test_database(), tempfile.TemporaryDirectory() as directory:
+        populate(count)
+        fixture = os.path.join(directory, "clinic.json")
+        export_dir = os.path.join(directory, "export")
+        models = ["auth.user", "appointments"]
+
+        results = {
+            "dumpdata": measure(lambda: call_command("dumpdata", *models, output=fixture, verbosity=0)),
+            "export_clinic": measure(lambda: export_clinic(export_dir)),
+        }
+        call_command("flush", interactive=False, verbosity=0)
+        results["loaddata"] = measure(lambda: call_command("loaddata", fixture, verbosity=0))
+        results["import_clinic"] = measure(lambda: import_clinic(export_dir, replace=True))
+
+        print(f"{count} agendamentos")
+        for name, (elapsed, peak) in results.items():
+            print(f"{name:>14}: {elapsed:7.2f} s  pico {peak:7.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,26 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
+
+Sob ASGI as views de leitura (home, catálogo, histórico e horários livres)
+rodam de forma assíncrona, e os middlewares do projeto (``core.middleware`` e
+``appointments.middleware``) rodam no event loop. Os do Django (security,
+sessions, common, csrf, auth, messages, clickjacking) usam o
+``MiddlewareMixin``: aceitam o modo assíncrono, mas cada ``process_request``
+e ``process_response`` roda num ``sync_to_async`` (na thread compartilhada),
+assim como as views síncronas restantes. Para servir:
+
+    pip install "uvicorn[standard]"
+    DJANGO_PROFILE=prod CACHE_BACKEND=file uvicorn core.asgi:application --host 0.0.0.0 --port 8000 --workers 4
+
+(com vários workers o cache precisa ser compartilhado, senão cada um tem os
+seus baldes do limite de requisições) ou, com daphne:
+
+    pip install daphne
+    DJANGO_PROFILE=prod daphne -b 0.0.0.0 -p 8000 core.asgi:application
+
+O ``core.wsgi`` continua funcionando (as views assíncronas rodam num event
+loop por requisição); ``python -m benchmarks.concurrency`` compara os dois.
 """
 
 import os
@@ -0,0 +1,159 @@
+import cProfile
+import random
+import threading
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils import timezone
+from whitenoise.middleware import WhiteNoiseMiddleware
+from .profiling import save_profile
+from .routers import request_scope
+
+PIN_COOKIE = "db_primary"
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoise que também roda no modo assíncrono.
+
+    O WhiteNoise só tem ``__call__`` síncrono; sob ASGI isso obrigaria toda
+    requisição a trocar de thread logo no começo da pilha. Aqui só a entrega
+    do arquivo (leitura de disco) vai para uma thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+
+class ReplicaPinningMiddleware:
+    """Mantém no banco primário, por alguns segundos, quem acabou de escrever."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        with request_scope(pinned=PIN_COOKIE in request.COOKIES) as state:
+            response = self.get_response(request)
+        return self.pin(response, state)
+
+    async def __acall__(self, request):
+        with request_scope(pinned=PIN_COOKIE in request.COOKIES) as state:
+            response = await self.get_response(request)
+        return self.pin(response, state)
+
+    def pin(self, response, state):
+        if state["wrote"]:
+            response.set_cookie(
+                PIN_COOKIE,
+                "1",
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+
+class RequestProfilingMiddleware:
+    """Perfila com cProfile uma amostra das requisições (ou as de staff com o cabeçalho).
+
+    ``PROFILING_SAMPLE_RATE`` é a fração amostrada (0 desliga); staff pode
+    pedir o perfil de uma requisição com o cabeçalho ``PROFILING_HEADER``.
+    Um perfil por vez por processo: o cProfile não aceita dois ativos, e sob
+    ASGI o perfil cobre a thread do event loop (código levado para outras
+    threads pelo ``sync_to_async`` não aparece).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.lock = threading.Lock()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def wanted(self, request):
+        rate = settings.PROFILING_SAMPLE_RATE
+        if rate and random.random() < rate:
+            return True
+        if settings.PROFILING_HEADER in request.META:
+            return request.user.is_staff
+        return False
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        if not self.wanted(request) or not self.lock.acquire(blocking=False):
+            return self.get_response(request)
+
+        try:
+            profiler = cProfile.Profile()
+            started = time.perf_counter()
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+            self.store(profiler, request, response, time.perf_counter() - started)
+        finally:
+            self.lock.release()
+        return response
+
+    async def __acall__(self, request):
+        if settings.PROFILING_HEADER in request.META:
+            # Garante request.user resolvido sem o ORM síncrono
+            request.user = await request.auser()
+
+        if not self.wanted(request) or not self.lock.acquire(blocking=False):
+            return await self.get_response(request)
+
+        try:
+            profiler = cProfile.Profile()
+            started = time.perf_counter()
+            profiler.enable()
+            try:
+                response = await self.get_response(request)
+            finally:
+                profiler.disable()
+            await sync_to_async(self.store)(profiler, request, response, time.perf_counter() - started)
+        finally:
+            self.lock.release()
+        return response
+
+    def store(self, profiler, request, response, elapsed):
+        match = request.resolver_match
+        save_profile(profiler, {
+            "path": request.path,
+            "method": request.method,
+            "view_name": match.view_name if match else None,
+            "status": response.status_code,
+            "duration_ms": round(elapsed * 1000, 2),
+            "captured_at": timezone.now().isoformat(),
+        })
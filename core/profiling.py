@@ -0,0 +1,88 @@
+"""Perfis (cProfile) de requisições amostradas em produção, guardados em disco.
+
+Cada requisição perfilada vira dois arquivos em ``PROFILING_DIR``: o
+``<id>.prof`` (formato do ``pstats``, abre no snakeviz) e o ``<id>.json`` com
+URL, view, status e tempo. Só os ``PROFILING_MAX_FILES`` mais recentes ficam.
+"""
+import json
+import pstats
+import re
+import uuid
+from pathlib import Path
+from django.conf import settings
+from django.utils import timezone
+
+# Formato dos ids gerados por ``save_profile``: outros arquivos do diretório não são perfis
+PROFILE_ID = re.compile(r"\d{20}-[0-9a-f]{8}")
+
+
+def profile_dir():
+    return Path(settings.PROFILING_DIR)
+
+
+def _metas(directory):
+    return [path for path in directory.glob("*.json") if PROFILE_ID.fullmatch(path.stem)]
+
+
+def save_profile(profiler, meta):
+    """Grava o perfil e os metadados; devolve o id."""
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+
+    profile_id = f"{timezone.now():%Y%m%d%H%M%S%f}-{uuid.uuid4().hex[:8]}"
+    profiler.dump_stats(directory / f"{profile_id}.prof")
+    (directory / f"{profile_id}.json").write_text(json.dumps({"id": profile_id, **meta}))
+
+    _prune(directory)
+    return profile_id
+
+
+def _prune(directory):
+    # Ids começam pela data, então a ordem dos nomes é a ordem de captura
+    metas = sorted(_metas(directory))
+    for meta in metas[:-settings.PROFILING_MAX_FILES]:
+        meta.unlink(missing_ok=True)
+        meta.with_suffix(".prof").unlink(missing_ok=True)
+
+
+def load_profiles():
+    """Metadados dos perfis guardados, do mais lento para o mais rápido."""
+    profiles = []
+    for path in _metas(profile_dir()):
+        try:
+            profiles.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            continue  # removido ou ainda sendo gravado
+
+    return sorted(profiles, key=lambda meta: meta["duration_ms"], reverse=True)
+
+
+def profile_path(profile_id):
+    # O id vem da URL: só aceita ids no formato gerado que existem no diretório
+    if not PROFILE_ID.fullmatch(profile_id):
+        return None
+    path = profile_dir() / f"{profile_id}.prof"
+    if not path.is_file():
+        return None
+    return path
+
+
+def hot_functions(profile_ids, limit=30):
+    """Funções somadas de vários perfis, ordenadas pelo tempo próprio (tottime)."""
+    paths = [path for path in map(profile_path, profile_ids) if path]
+    if not paths:
+        return []
+
+    stats = pstats.Stats(*map(str, paths))
+    rows = []
+    for (filename, line, name), (_, calls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            "function": f"{name} ({Path(filename).name}:{line})" if line else name,
+            "path": filename,
+            "calls": calls,
+            "tottime_ms": tottime * 1000,
+            "cumtime_ms": cumtime * 1000,
+        })
+
+    rows.sort(key=lambda row: row["tottime_ms"], reverse=True)
+    return rows[:limit]
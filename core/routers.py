@@ -0,0 +1,46 @@
+"""Roteamento opcional de leituras para uma réplica do banco.
+
+Leituras vão para a réplica, escritas para o primário. Depois que uma
+requisição escreve, ela passa a ler do primário e o ``ReplicaPinningMiddleware``
+mantém o usuário preso ao primário por ``REPLICA_PIN_SECONDS``, para que um
+agendamento recém-criado apareça imediatamente (read-your-writes).
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+
+PRIMARY = "default"
+
+_pinned = ContextVar("db_pinned_to_primary", default=False)
+_wrote = ContextVar("db_wrote", default=False)
+
+
+@contextmanager
+def request_scope(pinned=False):
+    """Isola o estado de roteamento de uma requisição; devolve se houve escrita."""
+    pinned_token = _pinned.set(pinned)
+    wrote_token = _wrote.set(False)
+    state = {"wrote": False}
+    try:
+        yield state
+    finally:
+        state["wrote"] = _wrote.get()
+        _pinned.reset(pinned_token)
+        _wrote.reset(wrote_token)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _pinned.get():
+            return PRIMARY
+        return settings.REPLICA_DATABASE
+
+    def db_for_write(self, model, **hints):
+        # A partir daqui a requisição lê só do primário
+        _wrote.set(True)
+        _pinned.set(True)
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primário e réplica têm os mesmos dados
+        return True
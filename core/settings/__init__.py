@@ -0,0 +1,18 @@
+"""Seleciona o perfil de configuração pela variável DJANGO_PROFILE (dev, test ou prod)."""
+import os
+from django.core.exceptions import ImproperlyConfigured
+from dotenv import load_dotenv
+
+# Carrega o .env antes de escolher o perfil, para DJANGO_PROFILE valer de lá também
+load_dotenv()
+
+PROFILE = os.getenv("DJANGO_PROFILE") or "dev"
+
+if PROFILE == "dev":
+    from .dev import *  # noqa: F401,F403
+elif PROFILE == "test":
+    from .test import *  # noqa: F401,F403
+elif PROFILE == "prod":
+    from .prod import *  # noqa: F401,F403
+else:
+    raise ImproperlyConfigured(f"DJANGO_PROFILE inválido: {PROFILE!r} (use dev, test ou prod).")
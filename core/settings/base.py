@@ -0,0 +1,226 @@
+"""
+Django settings for core project (configuração comum a todos os perfis).
+
+Generated by 'django-admin startproject' using Django 6.0.2.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/6.0/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/6.0/ref/settings/
+"""
+import os
+from pathlib import Path
+
+# As variáveis do .env já foram carregadas por core/settings/__init__.py
+
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/6.0/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = os.environ.get("SECRET_KEY")
+
+# SECURITY WARNING: don't run with debug turned on in production!
+# Cada perfil (dev/test/prod) define o seu
+DEBUG = False
+
+ALLOWED_HOSTS = []
+
+
+# Application definition
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+
+    'appointments',
+    "crispy_forms",
+    "crispy_bootstrap5",
+    'django_extensions',
+]
+
+CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
+CRISPY_TEMPLATE_PACK = "bootstrap5"
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'core.middleware.StaticFilesMiddleware',
+    'core.middleware.ReplicaPinningMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.RequestProfilingMiddleware',
+    'appointments.middleware.PatientProfileMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'core.urls'
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'core.wsgi.application'
+
+
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'clinic',
+    }
+}
+
+
+# Database
+# https://docs.djangoproject.com/en/6.0/ref/settings/#databases
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.getenv('DB_NAME'),
+        'USER': os.getenv('DB_USER'),
+        'PASSWORD': os.getenv('DB_PASSWORD'),
+        'HOST': os.getenv('DB_HOST'),
+        'PORT': os.getenv('DB_PORT'),
+    }
+}
+
+# Réplica de leitura opcional (core/routers.py)
+REPLICA_DATABASE = 'replica'
+REPLICA_PIN_SECONDS = 5
+
+if os.getenv('DB_REPLICA_HOST'):
+    DATABASES[REPLICA_DATABASE] = {
+        **DATABASES['default'],
+        'HOST': os.getenv('DB_REPLICA_HOST'),
+        'PORT': os.getenv('DB_REPLICA_PORT', os.getenv('DB_PORT')),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+
+
+# Sessão e usuário só ficam em cache entre requisições com um cache
+# compartilhado pelos processos (o prod liga com CACHE_BACKEND=file): no
+# locmem cada worker teria a sua cópia, e um logout ou usuário desativado
+# continuaria valendo nos outros
+SESSION_ENGINE = os.getenv("SESSION_ENGINE") or "django.contrib.sessions.backends.db"
+
+AUTHENTICATION_BACKENDS = [
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+# Por quanto tempo usuário (com cache compartilhado) e perfil do paciente ficam em cache
+PROFILE_CACHE_SECONDS = 60 * 30
+
+
+# Password validation
+# https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/6.0/topics/i18n/
+
+LANGUAGE_CODE = 'pt-br'
+
+TIME_ZONE = 'America/Sao_Paulo'
+
+USE_I18N = True
+USE_L10N = True
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/6.0/howto/static-files/
+
+STATIC_URL = 'static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# "python manage.py collectstatic" gera nomes com hash (manifest) e já deixa
+# prontas as versões .gz e .br; o WhiteNoise serve esses arquivos direto,
+# com cache "immutable" de longo prazo para os nomes com hash.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
+# Arquivos sem hash no nome (ex.: favicon) ficam em cache por um dia
+WHITENOISE_MAX_AGE = 60 * 60 * 24
+
+LOGIN_URL = 'appointments:login'
+LOGIN_REDIRECT_URL = 'appointments:home'
+LOGOUT_REDIRECT_URL = 'appointments:home'
+
+# Agendamentos encerrados mais antigos que isso vão para o arquivo
+# (manage.py archive_appointments)
+APPOINTMENT_ARCHIVE_AFTER_DAYS = int(os.getenv("APPOINTMENT_ARCHIVE_AFTER_DAYS") or 730)
+
+
+# Tela inicial: quantas próximas consultas mostrar e por quanto tempo o resumo fica em cache
+HOME_UPCOMING_LIMIT = 5
+HOME_SUMMARY_CACHE_SECONDS = 60 * 15
+
+# Por quantos minutos um horário escolhido fica reservado antes da confirmação
+SLOT_HOLD_MINUTES = 5
+
+# Ordem dos horários oferecidos: "best_fit" destaca os que deixam menos sobras
+# inaproveitáveis na agenda; "chronological" só lista (manage.py simulate_slot_policy compara)
+SLOT_POLICY = os.getenv("SLOT_POLICY") or "best_fit"
+
+# Limite de requisições (appointments/ratelimit.py): baldes por IP e por usuário
+RATE_LIMITS = {
+    "login": {"ip": "20/m", "user": "5/m"},
+    "slots": {"ip": "60/m", "user": "30/m"},
+}
+# Chave do request.META com o IP do cliente (atrás de proxy, ex.: HTTP_X_REAL_IP)
+RATE_LIMIT_IP_META = os.getenv("RATE_LIMIT_IP_META") or "REMOTE_ADDR"
+
+# Perfis de requisições (core/profiling.py): fração amostrada e cabeçalho
+# (X-Profile) com que staff pede o perfil de uma requisição específica
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE") or 0)
+PROFILING_HEADER = "HTTP_X_PROFILE"
+PROFILING_DIR = os.getenv("PROFILING_DIR") or BASE_DIR / "profiles"
+PROFILING_MAX_FILES = 200
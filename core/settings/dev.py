@@ -0,0 +1,4 @@
+"""Perfil de desenvolvimento: DEBUG ligado e templates relidos a cada requisição."""
+from .base import *  # noqa: F401,F403
+
+DEBUG = True
@@ -0,0 +1,49 @@
+"""Perfil de produção: DEBUG desligado, templates compilados em cache e compressão."""
+import os
+from .base import *  # noqa: F401,F403
+from .base import BASE_DIR, MIDDLEWARE, TEMPLATES
+
+DEBUG = False
+
+ALLOWED_HOSTS = [host for host in os.getenv("ALLOWED_HOSTS", "").split(",") if host]
+
+# Templates são lidos e compilados uma vez por processo
+TEMPLATES = [{
+    **TEMPLATES[0],
+    "APP_DIRS": False,
+    "OPTIONS": {
+        **TEMPLATES[0]["OPTIONS"],
+        "loaders": [
+            ("django.template.loaders.cached.Loader", [
+                "django.template.loaders.filesystem.Loader",
+                "django.template.loaders.app_directories.Loader",
+            ]),
+        ],
+    },
+}]
+
+# CACHE_BACKEND=file compartilha o cache entre os workers da mesma máquina; com
+# mais de um worker é o que mantém o limite de requisições (ratelimit.py) e o
+# usuário em cache consistentes entre eles
+if os.getenv("CACHE_BACKEND") == "file":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.getenv("CACHE_LOCATION") or str(BASE_DIR / ".cache"),
+        }
+    }
+    AUTHENTICATION_BACKENDS = [
+        "appointments.backends.CachedModelBackend",
+    ]
+    # cached_db grava no banco e lê do cache
+    SESSION_ENGINE = os.getenv("SESSION_ENGINE") or "django.contrib.sessions.backends.cached_db"
+
+# GZip logo depois do WhiteNoise (que já serve estáticos comprimidos) e
+# ConditionalGet depois dele, para o ETag ser calculado sobre o corpo final
+_static_index = MIDDLEWARE.index("core.middleware.StaticFilesMiddleware") + 1
+MIDDLEWARE = [
+    *MIDDLEWARE[:_static_index],
+    "django.middleware.gzip.GZipMiddleware",
+    "django.middleware.http.ConditionalGetMiddleware",
+    *MIDDLEWARE[_static_index:],
+]
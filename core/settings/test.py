@@ -0,0 +1,35 @@
+"""Perfil de testes: dois bancos SQLite locais (primário e réplica).
+
+    DJANGO_PROFILE=test python manage.py test
+"""
+from .base import *  # noqa: F401,F403
+
+SECRET_KEY = "test"
+
+DEBUG = False
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "test-primary.sqlite3",
+    },
+    REPLICA_DATABASE: {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "test-replica.sqlite3",
+    },
+}
+
+# O roteador é ligado só nos testes que usam a réplica (override_settings)
+DATABASE_ROUTERS = []
+
+PASSWORD_HASHERS = [
+    "django.contrib.auth.hashers.MD5PasswordHasher",
+]
+
+# Testes não rodam o collectstatic, então não há manifest de arquivos com hash
+STORAGES = {
+    **STORAGES,
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}